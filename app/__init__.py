@@ -7,16 +7,76 @@ from .models import db  # Ya contiene la instancia de SQLAlchemy
 
 load_dotenv()  # Cargar variables de entorno desde .env
 
-def create_app():
+from .config import Config  # Después de load_dotenv: Config lee el entorno al importarse
+
+def create_app(config_class=Config):
     app = Flask(__name__)
 
-    # Configuración desde variables de entorno
-    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL')
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'changeme-in-production')
+    # Configuración desde variables de entorno (ver app/config.py)
+    app.config.from_object(config_class)
+
+    from .utils.dbpool import engine_options, register_pool_metrics
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
+
+    # Métricas por endpoint: tiempo total, tiempo en la base y sentencias SQL
+    from .utils.metrics import request_metrics
+    request_metrics.init_app(app)
 
     # Inicializar base de datos
     db.init_app(app)
+    with app.app_context():
+        register_pool_metrics(db.engine)
+        request_metrics.register_engine(db.engine)
+
+    # Estado compartido entre workers (contadores, claves con TTL)
+    from .utils.state import shared_state
+    shared_state.init_app(app)
+
+    # Rate limiting (backend en memoria por defecto)
+    from .utils.ratelimit import limiter
+    limiter.init_app(app)
+
+    # Idempotency-Key en los POST de creación (backend en memoria por defecto)
+    from .utils.idempotency import idempotency
+    idempotency.init_app(app)
+
+    # Retención de vt_request_logs (backend 'durable')
+    from .services.retention import request_log_retention
+    request_log_retention.init_app(app)
+
+    # Caches de seguridad: tokens verificados, status de usuarios y claves de locales
+    from .utils.security import verified_tokens, user_status_cache, location_keys
+    verified_tokens.configure(max_size=app.config.setdefault('JWT_CACHE_SIZE', 10000))
+    user_status_cache.init_app(app)
+    location_keys.init_app(app)
+
+    # Hash de contraseñas en un pool acotado (tpool con eventlet)
+    from .utils.hashing import password_hasher
+    password_hasher.init_app(app)
+
+    # Cache de papeletas (evento → secciones → opciones)
+    from .services.ballot_cache import ballot_cache
+    ballot_cache.init_app(app)
+
+    # Ingesta de votos (directa o en lotes con group commit)
+    from .services.vote_queue import vote_writer
+    vote_writer.init_app(app)
+
+    # Conteo en vivo de resultados
+    from .services.tally import tally
+    tally.init_app(app)
+
+    # Resultados en tiempo real por Socket.IO
+    from .sockets import init_socketio
+    init_socketio(app)
+
+    # Apertura y cierre de eventos (precarga de caches, conteo congelado)
+    from .services.lifecycle import event_scheduler
+    event_scheduler.init_app(app)
+
+    # Comandos de la CLI (flask ...)
+    from .commands import register_commands
+    register_commands(app)
 
     # Registrar blueprint (después de configurar todo)
     from .routes import votario
@@ -24,3 +84,28 @@ def create_app():
 
 
     return app
+
+
+def start_background_jobs(app):
+    """
+    Arranca los hilos de fondo habilitados (scheduler de eventos y poda de
+    vt_request_logs) y precarga el índice de claves de kioskos, para que el
+    primer kiosko de cada worker no pague la carga. Lo llaman los puntos de
+    entrada del servidor (serve.py, wsgi.py, run.py), no create_app, para que
+    la CLI y los benchmarks no lo hagan.
+    """
+    from sqlalchemy import inspect
+    from .models import VotingLocation
+    from .utils.security import location_keys
+    with app.app_context():
+        # Sin tablas todavía (base nueva, antes de flask init-db): se carga en el primer uso
+        if inspect(db.engine).has_table(VotingLocation.__tablename__):
+            location_keys.reload()
+
+    from .services.lifecycle import event_scheduler
+    if event_scheduler.enabled:
+        event_scheduler.start()
+
+    from .services.retention import request_log_retention
+    if request_log_retention.enabled:
+        request_log_retention.start()
@@ -0,0 +1,122 @@
+import click
+from flask.cli import AppGroup
+
+
+@click.command('init-db')
+def init_db():
+    """Crea las tablas que falten (una vez por despliegue, no en cada worker)."""
+    from app.models import db
+
+    db.create_all()
+    click.echo('Database schema created')
+
+
+rollups_cli = AppGroup('rollups', help='Rollups de votos por zona geográfica.')
+
+
+@rollups_cli.command('rebuild')
+@click.option('--event-id', type=int, default=None, help='Solo este evento (por defecto, todos).')
+def rebuild_rollups(event_id):
+    """Recalcula vt_vote_rollups desde vt_votes."""
+    from app.services import rollups
+
+    buckets = rollups.rebuild(event_id)
+    click.echo(f'Rollups rebuilt: {buckets} buckets')
+
+
+tally_cli = AppGroup('tally', help='Conteo en vivo por opción (vt_vote_tallies).')
+
+
+@tally_cli.command('rebuild')
+@click.argument('event_id', type=int)
+def rebuild_tally(event_id):
+    """Recalcula el conteo de un evento desde vt_votes (se puede correr con votación en curso)."""
+    from app.services.tally import tally
+
+    rows = tally.rebuild(event_id)
+    click.echo(f'Tally rebuilt: {rows} rows')
+
+
+request_logs_cli = AppGroup('request-logs', help='Retención de vt_request_logs.')
+
+
+@request_logs_cli.command('prune')
+def prune_request_logs():
+    """Poda una vez las filas vencidas de vt_request_logs."""
+    from app.services.retention import request_log_retention
+
+    rows = request_log_retention.prune()
+    stats = request_log_retention.stats()
+    click.echo(f'Pruned {rows} rows in {stats["last_duration_seconds"]:.3f}s')
+
+
+@request_logs_cli.command('partition-init')
+def init_request_log_partitions():
+    """Crea vt_request_logs particionada por día (PostgreSQL, base nueva)."""
+    from app.services.retention import create_partitioned_table
+
+    create_partitioned_table()
+    click.echo('vt_request_logs is now partitioned by day')
+
+
+voters_cli = AppGroup('voters', help='Padrón de votantes.')
+
+
+@voters_cli.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--batch-size', type=int, default=None, help='Filas por lote (por defecto VOTER_IMPORT_BATCH_SIZE).')
+def import_voters(path, batch_size):
+    """Importa un CSV del padrón (document_number, first_name, last_name, region, ..., email)."""
+    import csv
+    from app.services.voter_roll import import_voter_roll
+
+    def progress(report):
+        stats = report.to_dict()
+        click.echo(
+            f'{stats["read"]} read, {stats["created"]} created, {stats["skipped"]} skipped, '
+            f'{stats["invalid"]} invalid, {stats["failed"]} failed - {stats["rows_per_second"]} rows/s'
+        )
+
+    with open(path, encoding='utf-8-sig', newline='') as handle:
+        report = import_voter_roll(csv.DictReader(handle), batch_size=batch_size, on_progress=progress, processes=True)
+
+    stats = report.to_dict()
+    for error in stats['errors']:
+        click.echo(f'row {error["row"]}: {error["error"]}', err=True)
+    click.echo(f'Imported {stats["created"]} voters in {stats["elapsed_seconds"]:.1f}s')
+    if stats['without_password']:
+        click.echo(f'{stats["without_password"]} voters have no password yet; '
+                   f'hand them a token from `flask voters password-tokens`')
+
+
+@voters_cli.command('password-tokens')
+@click.argument('output', type=click.Path(dir_okay=False, writable=True))
+def voter_password_tokens(output):
+    """Escribe un CSV (user_id, email, document_number, token) para los votantes sin contraseña."""
+    import csv
+    from app.models import db, User
+    from app.utils.hashing import UNUSABLE_PASSWORD
+    from app.utils.security import generate_password_token
+
+    users = db.session.execute(
+        db.select(User).filter(User.password == UNUSABLE_PASSWORD, User.status != 'deleted').
+        execution_options(yield_per=1000)
+    ).scalars()
+
+    written = 0
+    with open(output, 'w', encoding='utf-8', newline='') as handle:
+        writer = csv.writer(handle)
+        writer.writerow(['user_id', 'email', 'document_number', 'token'])
+        for user in users:
+            writer.writerow([user.id, user.email, user.document_number, generate_password_token(user)])
+            written += 1
+
+    click.echo(f'Wrote {written} password tokens to {output}')
+
+
+def register_commands(app):
+    app.cli.add_command(init_db)
+    app.cli.add_command(rollups_cli)
+    app.cli.add_command(tally_cli)
+    app.cli.add_command(request_logs_cli)
+    app.cli.add_command(voters_cli)
@@ -25,3 +25,35 @@ def seed_roles():
         return jsonify({'message': 'Roles created', 'created': created}), 201
     else:
         return jsonify({'message': 'No roles created, all already exist'}), 200
+
+
+@require_api_key('ADMIN_API_KEY')
+def stats():
+    from app.services.ballot_cache import ballot_cache
+    from app.utils.security import user_status_cache
+    from app.utils.dbpool import pool_metrics
+    from app.services.retention import request_log_retention
+    from app.utils.idempotency import idempotency
+    from app.utils.hashing import password_hasher
+    from app.utils.metrics import request_metrics
+    from app.services.lifecycle import event_scheduler
+
+    return jsonify({
+        'db_pool': pool_metrics.snapshot(),
+        'ballot_cache': ballot_cache.stats(),
+        'user_status_cache': user_status_cache.stats(),
+        'request_log_retention': request_log_retention.stats(),
+        'idempotency': idempotency.stats(),
+        'password_hashing': password_hasher.stats(),
+        'event_scheduler': event_scheduler.stats(),
+        'request_latency': request_metrics.summary()
+    }), 200
+
+
+@require_api_key('ADMIN_API_KEY')
+def metrics():
+    """Histogramas por endpoint en formato de texto de Prometheus."""
+    from flask import Response
+    from app.utils.metrics import request_metrics
+
+    return Response(request_metrics.prometheus(), mimetype='text/plain; version=0.0.4')
@@ -1,8 +1,11 @@
-from flask import request, jsonify, g
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import request, jsonify, g, current_app
 from app.models import db, User
 import datetime
-from app.utils.security import require_api_key, generate_jwt, jwt_required, active_user_required, role_required
+from app.utils.security import require_api_key, generate_jwt, jwt_required, active_user_required, role_required, user_status_cache
+from app.utils.security import generate_password_token, verify_password_token
+from app.utils.idempotency import idempotent
+from app.utils.ratelimit import rate_limit
+from app.utils.hashing import password_hasher
 
 @require_api_key('AUTH_API_KEY')
 @jwt_required
@@ -16,6 +19,7 @@ def protected_route():
     }), 200
 
 @require_api_key('AUTH_API_KEY')
+@idempotent
 def register():
     data = request.get_json()
 
@@ -27,7 +31,7 @@ def register():
     if User.query.filter_by(email=data['email']).first():
         return jsonify({"error": "Email already registered"}), 409
 
-    hashed_password = generate_password_hash(data['password'])
+    hashed_password = password_hasher.hash(data['password'])
 
     new_user = User(
         email=data['email'],
@@ -59,7 +63,7 @@ def login():
         return jsonify({"error": "Account locked due to too many failed login attempts"}), 403
 
     # Verificamos la contraseña
-    if not check_password_hash(user.password, data['password']):
+    if not password_hasher.check(user.password, data['password']):
         user.failed_login_attempts = (user.failed_login_attempts or 0) + 1
 
         # Si supera el límite
@@ -67,6 +71,7 @@ def login():
             user.status = 'inactive_max_login_attempts'
 
         db.session.commit()
+        user_status_cache.invalidate(user.id)
 
         return jsonify({"error": "Invalid credentials"}), 401
 
@@ -87,6 +92,48 @@ def login():
     }), 200
 
 
+@require_api_key('ADMIN_API_KEY')
+@jwt_required
+@active_user_required
+@role_required('admin')
+def password_token():
+    """Emite un token para que el usuario defina o restablezca su contraseña."""
+    data = request.get_json(silent=True) or {}
+    if not data.get('email'):
+        return jsonify({"error": "Missing email"}), 400
+
+    user = User.query.filter_by(email=data['email']).first()
+    if not user or user.status == 'deleted':
+        return jsonify({"error": "User not found"}), 404
+
+    return jsonify({
+        "token": generate_password_token(user),
+        "expires_in": current_app.config.get('PASSWORD_TOKEN_TTL', 7 * 86400)
+    }), 200
+
+
+@require_api_key('AUTH_API_KEY')
+@rate_limit(limit=5, seconds=60)
+def reset_password():
+    """Define la contraseña con un token de password_token (o de `flask voters password-tokens`)."""
+    data = request.get_json(silent=True) or {}
+    if not data.get('token') or not data.get('password'):
+        return jsonify({"error": "Missing token or password"}), 400
+
+    user = verify_password_token(data['token'])
+    if user is None:
+        return jsonify({"error": "Invalid or expired token"}), 400
+
+    user.password = password_hasher.hash(data['password'])
+    user.failed_login_attempts = 0
+    if user.status == 'inactive_max_login_attempts':
+        user.status = 'active'
+    db.session.commit()
+    user_status_cache.invalidate(user.id)
+
+    return jsonify({"message": "Password updated"}), 200
+
+
 @require_api_key('AUTH_API_KEY')
 def seed_users():
     sample_users = [
@@ -95,20 +142,26 @@ def seed_users():
         {"email": "voter@votario.com", "password": "voter123", "role_id": 3}
     ]
 
+    existing = {
+        email for (email,) in
+        db.session.query(User.email).filter(User.email.in_([user['email'] for user in sample_users]))
+    }
+    pending = [user_data for user_data in sample_users if user_data['email'] not in existing]
+
+    # Los hashes se calculan en paralelo en el pool de password_hasher
+    hashes = password_hasher.hash_many(user_data['password'] for user_data in pending)
+
     created = []
 
-    for user_data in sample_users:
-        existing = User.query.filter_by(email=user_data['email']).first()
-        if not existing:
-            hashed_pw = generate_password_hash(user_data['password'])
-            user = User(
-                email=user_data['email'],
-                password=hashed_pw,
-                role_id=user_data['role_id'],
-                created_at=datetime.datetime.utcnow()
-            )
-            db.session.add(user)
-            created.append(user_data['email'])
+    for user_data, hashed_pw in zip(pending, hashes):
+        user = User(
+            email=user_data['email'],
+            password=hashed_pw,
+            role_id=user_data['role_id'],
+            created_at=datetime.datetime.utcnow()
+        )
+        db.session.add(user)
+        created.append(user_data['email'])
 
     if created:
         db.session.commit()
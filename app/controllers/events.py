@@ -1,12 +1,19 @@
 from flask import request, jsonify, g
 from app.models import db, Event
+from app.services.ballot_cache import ballot_cache
+from app.services.tally import tally
+from app.services.lifecycle import event_scheduler
+from app.services import rollups
 from app.utils.security import require_api_key, jwt_required, role_required, active_user_required
+from app.utils.idempotency import idempotent
+from app.utils.pagination import paginated_response
 from datetime import datetime
 
 @require_api_key('ADMIN_API_KEY')
 @jwt_required
 @active_user_required
 @role_required('admin')
+@idempotent
 def create():
     data = request.get_json()
 
@@ -39,6 +46,8 @@ def create():
 
     db.session.add(new_event)
     db.session.commit()
+    ballot_cache.invalidate(new_event.id)
+    event_scheduler.arm(new_event)
 
     return jsonify({
         "message": "Event created successfully",
@@ -51,18 +60,15 @@ def create():
 @active_user_required
 @role_required('admin')
 def get_all():
-    events = Event.query.filter(Event.status != 'deleted').all()
-    return jsonify([
-        {
-            "id": e.id,
-            "name": e.name,
-            "description": e.description,
-            "start_datetime": e.start_datetime.isoformat(),
-            "end_datetime": e.end_datetime.isoformat(),
-            "status": e.status
-        }
-        for e in events
-    ]), 200
+    query = Event.query.filter(Event.status != 'deleted')
+    return paginated_response(query, Event.id, {
+        "id": Event.id,
+        "name": Event.name,
+        "description": Event.description,
+        "start_datetime": Event.start_datetime,
+        "end_datetime": Event.end_datetime,
+        "status": Event.status
+    })
 
 
 @require_api_key('ADMIN_API_KEY')
@@ -96,13 +102,25 @@ def update(event_id):
         return jsonify({"error": "Event not found"}), 404
 
     # Campos opcionales para actualizar
-    for field in ['name', 'description', 'start_datetime', 'end_datetime']:
+    for field in ['name', 'description']:
         if field in data:
             setattr(event, field, data[field])
 
+    try:
+        start = datetime.fromisoformat(data['start_datetime']) if 'start_datetime' in data else event.start_datetime
+        end = datetime.fromisoformat(data['end_datetime']) if 'end_datetime' in data else event.end_datetime
+    except Exception:
+        return jsonify({"error": "Invalid datetime format. Use ISO 8601"}), 400
+    if end <= start:
+        return jsonify({"error": "End datetime must be after start datetime"}), 400
+
+    event.start_datetime = start
+    event.end_datetime = end
     event.modified_by = g.user['user_id']
     
     db.session.commit()
+    ballot_cache.invalidate(event.id)
+    event_scheduler.arm(event)
     return jsonify({"message": "Event updated"}), 200
 
 
@@ -124,6 +142,8 @@ def update_status(event_id):
     event.status = new_status
     event.modified_by = g.user['user_id']
     db.session.commit()
+    ballot_cache.invalidate(event.id)
+    event_scheduler.arm(event)
 
     return jsonify({"message": f"Event status updated to '{new_status}'"}), 200
 
@@ -141,4 +161,41 @@ def delete(event_id):
     event.status = 'deleted'
     event.modified_by = g.user['user_id']
     db.session.commit()
-    return jsonify({"message": "Event deleted (soft)"}), 200
\ No newline at end of file
+    ballot_cache.invalidate(event.id)
+    event_scheduler.arm(event)
+    return jsonify({"message": "Event deleted (soft)"}), 200
+
+
+@require_api_key('ADMIN_API_KEY')
+@jwt_required
+@active_user_required
+@role_required('admin', 'moderator')
+def results(event_id):
+    ballot = ballot_cache.get(event_id)
+    if ballot is None:
+        return jsonify({"error": "Event not found"}), 404
+
+    return jsonify(tally.results(ballot)), 200
+
+
+
+@require_api_key('ADMIN_API_KEY')
+@jwt_required
+@active_user_required
+@role_required('admin', 'moderator')
+def results_by_geography(event_id):
+    if ballot_cache.get(event_id) is None:
+        return jsonify({"error": "Event not found"}), 404
+
+    level = request.args.get('level', 'district')
+    if level not in rollups.LEVELS:
+        return jsonify({"error": "Invalid level. Use region, province or district"}), 400
+
+    section_id = request.args.get('section_id', type=int)
+    filters = {name: request.args[name] for name in rollups.LEVELS if name in request.args}
+
+    return jsonify({
+        "event_id": event_id,
+        "level": level,
+        "areas": rollups.results_by_geography(event_id, level, section_id, filters)
+    }), 200
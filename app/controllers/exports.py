@@ -0,0 +1,121 @@
+from flask import request, jsonify, Response, stream_with_context, current_app
+from sqlalchemy import select
+from app.models import db, Vote, Section, Option
+from app.services.ballot_cache import ballot_cache
+from app.services.tally import tally
+from app.utils.security import require_api_key, jwt_required, role_required, active_user_required
+from datetime import datetime
+import csv
+import io
+import json
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+
+def _stream(rows, columns, fmt, filename):
+    """Respuesta en streaming: las filas se escriben a medida que llegan del cursor."""
+    def generate():
+        if fmt == 'csv':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            for row in rows:
+                writer.writerow(row)
+                if buffer.tell() > 64 * 1024:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+            yield buffer.getvalue()
+        else:
+            for row in rows:
+                yield json.dumps(dict(zip(columns, row)), default=str) + '\n'
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype=FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename="{filename}.{fmt}"'}
+    )
+
+
+def _vote_rows(statement):
+    # yield_per usa un cursor del lado del servidor donde el driver lo soporta
+    yield_per = current_app.config.get('EXPORT_YIELD_PER', 1000)
+    result = db.session.execute(statement.execution_options(yield_per=yield_per))
+    for row in result:
+        yield tuple(value.isoformat() if isinstance(value, datetime) else value for value in row)
+
+
+@require_api_key('ADMIN_API_KEY')
+@jwt_required
+@active_user_required
+@role_required('admin')
+def votes(event_id):
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in FORMATS:
+        return jsonify({"error": "Invalid format. Use ndjson or csv"}), 400
+
+    if ballot_cache.get(event_id) is None:
+        return jsonify({"error": "Event not found"}), 404
+
+    try:
+        since = datetime.fromisoformat(request.args['since']) if 'since' in request.args else None
+        until = datetime.fromisoformat(request.args['until']) if 'until' in request.args else None
+    except ValueError:
+        return jsonify({"error": "Invalid datetime format. Use ISO 8601"}), 400
+
+    columns = ['vote_id', 'timestamp', 'section_id', 'section_name', 'option_id', 'option_label']
+    statement = select(
+        Vote.id,
+        Vote.timestamp,
+        Vote.section_id,
+        Section.name,
+        Vote.option_id,
+        Option.label
+    ).join(Section, Vote.section_id == Section.id).\
+        join(Option, Vote.option_id == Option.id).\
+        where(Section.event_id == event_id).\
+        order_by(Vote.id)
+
+    section_id = request.args.get('section_id', type=int)
+    if section_id is not None:
+        statement = statement.where(Vote.section_id == section_id)
+    if since is not None:
+        statement = statement.where(Vote.timestamp >= since)
+    if until is not None:
+        statement = statement.where(Vote.timestamp < until)
+
+    return _stream(_vote_rows(statement), columns, fmt, f'event-{event_id}-votes')
+
+
+@require_api_key('ADMIN_API_KEY')
+@jwt_required
+@active_user_required
+@role_required('admin')
+def results(event_id):
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in FORMATS:
+        return jsonify({"error": "Invalid format. Use ndjson or csv"}), 400
+
+    ballot = ballot_cache.get(event_id)
+    if ballot is None:
+        return jsonify({"error": "Event not found"}), 404
+
+    labels = dict(
+        ((section_id, option_id), (section_name, option_label))
+        for section_id, section_name, option_id, option_label in
+        db.session.query(Section.id, Section.name, Option.id, Option.label).
+        join(Option, Option.section_id == Section.id).
+        filter(Section.event_id == event_id)
+    )
+
+    columns = ['section_id', 'section_name', 'option_id', 'option_label', 'votes']
+    rows = []
+    for section in tally.results(ballot)['sections']:
+        for option in section['options']:
+            section_name, option_label = labels.get((section['section_id'], option['option_id']), (None, None))
+            rows.append((section['section_id'], section_name, option['option_id'], option_label, option['votes']))
+
+    return _stream(rows, columns, fmt, f'event-{event_id}-results')
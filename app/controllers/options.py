@@ -1,20 +1,21 @@
 from flask import request, jsonify, g
 from app.models import db, Option, Section, Event
+from app.services.ballot_cache import ballot_cache
 from app.utils.security import require_api_key, jwt_required, role_required, active_user_required
+from app.utils.idempotency import idempotent
+from app.utils.pagination import paginated_response
+from app.utils.bulk import bulk_insert, bulk_response, iter_rows, BulkInputError
 from datetime import datetime
 
-@require_api_key('ADMIN_API_KEY')
-@jwt_required
-@active_user_required
-@role_required('admin')
-def create():
-    data = request.get_json()
-
+def _validate(data):
     required_fields = ['label', 'image_url', 'section_id']
     if not all(field in data for field in required_fields):
-        return jsonify({"error": "Missing required fields"}), 400
+        return "Missing required fields"
+    return None
 
-    new_option = Option(
+
+def _build(data):
+    return dict(
         label = data['label'],
         description = data.get('description'),
         image_url = data['image_url'],
@@ -22,8 +23,31 @@ def create():
         created_by = g.user['user_id']
     )
 
+
+@require_api_key('ADMIN_API_KEY')
+@jwt_required
+@active_user_required
+@role_required('admin')
+@idempotent
+def create():
+    data = request.get_json()
+
+    error = _validate(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    try:
+        section = db.session.get(Section, int(data['section_id']))
+    except (TypeError, ValueError):
+        section = None
+    if not section or section.status == 'deleted':
+        return jsonify({"error": "Section not found"}), 404
+
+    new_option = Option(**_build(data))
+
     db.session.add(new_option)
     db.session.commit()
+    ballot_cache.invalidate(section.event_id)
 
     return jsonify({
         "message": "Option created successfully",
@@ -31,32 +55,56 @@ def create():
     }), 201
 
 
+@require_api_key('ADMIN_API_KEY')
+@jwt_required
+@active_user_required
+@role_required('admin')
+@idempotent
+def bulk_create():
+    try:
+        created, errors = bulk_insert(
+            Option, iter_rows(), _validate, _build,
+            parent=('section_id', Section, "Section not found")
+        )
+    except BulkInputError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if created:
+        option_ids = [row['id'] for row in created]
+        event_ids = db.session.query(Section.event_id).\
+            join(Option, Option.section_id == Section.id).\
+            filter(Option.id.in_(option_ids)).\
+            distinct().all()
+        for (event_id,) in event_ids:
+            ballot_cache.invalidate(event_id)
+
+    body, status = bulk_response(created, errors)
+    return jsonify(body), status
+
+
 @require_api_key('ADMIN_API_KEY')
 @jwt_required
 @active_user_required
 @role_required('admin')
 def get_all():
-    options = db.session.query(Option, Section, Event).\
+    query = db.session.query(Option).\
         join(Section, Option.section_id == Section.id).\
         join(Event, Section.event_id == Event.id).\
         filter(
             Option.status != 'deleted',
             Section.status != 'deleted',
             Event.status != 'deleted'
-        ).all()
-
-    return jsonify([
-        {
-            "id": option.id,
-            "label": option.label,
-            "description": option.description,
-            "image_url": option.image_url,
-            "status": option.status,
-            "section_name": section.name,
-            "event_name": event.name
-        }
-        for option, section, event in options
-    ]), 200
+        )
+
+    return paginated_response(query, Option.id, {
+        "id": Option.id,
+        "label": Option.label,
+        "description": Option.description,
+        "image_url": Option.image_url,
+        "status": Option.status,
+        "section_name": Section.name,
+        "event_name": Event.name
+    })
 
 
 @require_api_key('ADMIN_API_KEY')
@@ -96,6 +144,7 @@ def update(option_id):
     option.modified_by = g.user['user_id']
 
     db.session.commit()
+    ballot_cache.invalidate(option.section.event_id)
     return jsonify({"message": "Option updated"}), 200
 
 
@@ -117,6 +166,7 @@ def update_status(option_id):
     option.status = new_status
     option.modified_by = g.user['user_id']
     db.session.commit()
+    ballot_cache.invalidate(option.section.event_id)
 
     return jsonify({"message": f"Option status updated to '{new_status}'"}), 200
 
@@ -134,4 +184,5 @@ def delete(option_id):
     option.status = 'deleted'
     option.modified_by = g.user['user_id']
     db.session.commit()
+    ballot_cache.invalidate(option.section.event_id)
     return jsonify({"message": "Option deleted (soft)"}), 200
\ No newline at end of file
@@ -1,28 +1,52 @@
 from flask import request, jsonify, g
-from app.models import db, Section
+from app.models import db, Section, Event
+from app.services.ballot_cache import ballot_cache
 from app.utils.security import require_api_key, jwt_required, role_required, active_user_required
+from app.utils.idempotency import idempotent
+from app.utils.pagination import paginated_response
+from app.utils.bulk import bulk_insert, bulk_response, iter_rows, BulkInputError
 from datetime import datetime
 
+def _validate(data):
+    required_fields = ['name', 'event_id']
+    if not all(field in data for field in required_fields):
+        return "Missing required fields"
+    return None
+
+
+def _build(data):
+    return dict(
+        name = data['name'],
+        description = data.get('description'),
+        event_id = data['event_id'],
+        created_by = g.user['user_id']
+    )
+
+
 @require_api_key('ADMIN_API_KEY')
 @jwt_required
 @active_user_required
 @role_required('admin')
+@idempotent
 def create():
     data = request.get_json()
     
-    required_fields = ['name', 'event_id']
-    if not all(field in data for field in required_fields):
-        return jsonify({"error": "Missing required fields"}), 400
+    error = _validate(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    try:
+        event = db.session.get(Event, int(data['event_id']))
+    except (TypeError, ValueError):
+        event = None
+    if not event or event.status == 'deleted':
+        return jsonify({"error": "Event not found"}), 404
     
-    new_section = Section(
-        name = data['name'],
-        description = data.get('description'),
-        event_id = data['event_id'],
-        created_by = g.user['user_id']
-    )
+    new_section = Section(**_build(data))
     
     db.session.add(new_section)
     db.session.commit()
+    ballot_cache.invalidate(new_section.event_id)
     
     return jsonify ({
         "message": "Section created successfully",
@@ -30,21 +54,40 @@ def create():
     }), 201
     
     
+@require_api_key('ADMIN_API_KEY')
+@jwt_required
+@active_user_required
+@role_required('admin')
+@idempotent
+def bulk_create():
+    try:
+        created, errors = bulk_insert(
+            Section, iter_rows(), _validate, _build,
+            parent=('event_id', Event, "Event not found"),
+            returning=('event_id',)
+        )
+    except BulkInputError as e:
+        return jsonify({"error": str(e)}), 400
+
+    for event_id in {row['event_id'] for row in created}:
+        ballot_cache.invalidate(event_id)
+
+    body, status = bulk_response(created, errors)
+    return jsonify(body), status
+    
+    
 @require_api_key('ADMIN_API_KEY')
 @jwt_required
 @active_user_required
 @role_required('admin')
 def get_all():
-    sections = Section.query.filter(Section.status != 'deleted').all()
-    return jsonify([
-        {
-            "id": e.id,
-            "name": e.name,
-            "description": e.description,
-            "status": e.status
-        }
-        for e in sections
-    ]), 200
+    query = Section.query.filter(Section.status != 'deleted')
+    return paginated_response(query, Section.id, {
+        "id": Section.id,
+        "name": Section.name,
+        "description": Section.description,
+        "status": Section.status
+    })
     
     
 @require_api_key('ADMIN_API_KEY')
@@ -83,6 +126,7 @@ def update(section_id):
     section.modified_by = g.user['user_id']
 
     db.session.commit()
+    ballot_cache.invalidate(section.event_id)
     return jsonify({"message": "Section updated"}), 200
 
 
@@ -104,6 +148,7 @@ def update_status(section_id):
     section.status = new_status
     section.modified_by = g.user['user_id']
     db.session.commit()
+    ballot_cache.invalidate(section.event_id)
 
     return jsonify({"message": f"Section status updated to '{new_status}'"}), 200
 
@@ -121,4 +166,5 @@ def delete(section_id):
     section.status = 'deleted'
     section.modified_by = g.user['user_id']
     db.session.commit()
+    ballot_cache.invalidate(section.event_id)
     return jsonify({"message": "Section deleted (soft)"}), 200
\ No newline at end of file
@@ -0,0 +1,29 @@
+from flask import jsonify
+from app.services.voter_roll import import_voter_roll
+from app.utils.bulk import iter_rows, BulkInputError
+from app.utils.security import require_api_key, jwt_required, role_required, active_user_required
+
+@require_api_key('ADMIN_API_KEY')
+@jwt_required
+@active_user_required
+@role_required('admin')
+def import_roll():
+    """
+    Importa el padrón de votantes desde un CSV subido en 'file' (o un arreglo JSON).
+    Para padrones nacionales conviene el comando `flask voters import`.
+    """
+    try:
+        report = import_voter_roll(iter_rows())
+    except BulkInputError as e:
+        return jsonify({"error": str(e)}), 400
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 409
+
+    # Los duplicados se omiten: reimportar el mismo padrón devuelve 200 con todo en 'skipped'
+    body = report.to_dict()
+    errors = body['invalid'] + body['failed']
+    if not errors:
+        status = 201 if body['created'] else 200
+    else:
+        status = 207 if body['created'] else 400
+    return jsonify(body), status
@@ -1,11 +1,13 @@
-from flask import request, jsonify, g
-from app.models import db, Event, Section, Option, Vote
-from app.utils.security import require_api_key, jwt_required, role_required
-from datetime import datetime
+from flask import request, jsonify, g, current_app
+from app.services import voting
+from app.utils.security import require_api_key, jwt_required, role_required, user_status_cache, require_location_key
+from app.utils.idempotency import idempotent
+from app.utils.ratelimit import rate_limit
 
 @require_api_key('VOTES_API_KEY')
 @jwt_required
 @role_required('voter')
+@idempotent
 def cast_vote():
     data = request.get_json()
 
@@ -14,36 +16,76 @@ def cast_vote():
         return jsonify({'error': 'Missing voting data'}), 400
 
     # Validar estado del usuario
-    if g.user.get('status') != 'active':
+    if user_status_cache.get_status(g.user['user_id']) != 'active':
         return jsonify({'error': 'User is not active'}), 403
 
-    event = Event.query.get(data['event_id'])
-    if not event:
-        return jsonify({'error': 'Event not found'}), 404
+    try:
+        vote_id = voting.cast_vote(
+            user_id=g.user['user_id'],
+            event_id=data['event_id'],
+            section_id=data['section_id'],
+            option_id=data['option_id']
+        )
+    except voting.VoteError as e:
+        return jsonify({'error': e.message}), e.status_code
 
-    now = datetime.utcnow()
-    if not (event.start_datetime <= now <= event.end_datetime):
-        return jsonify({'error': 'Voting is closed for this event'}), 403
+    if vote_id is None:
+        return jsonify({'message': 'Vote accepted, pending confirmation'}), 202
+    return jsonify({'message': 'Vote cast successfully'}), 201
 
-    section = Section.query.filter_by(id=data['section_id'], event_id=event.id).first()
-    if not section:
-        return jsonify({'error': 'Section not found in this event'}), 404
 
-    option = Option.query.filter_by(id=data['option_id'], section_id=section.id).first()
-    if not option:
-        return jsonify({'error': 'Option not found in this section'}), 404
+@require_location_key
+@rate_limit(limit=60, seconds=60)
+def kiosk_vote():
+    """
+    Voto emitido desde el kiosko de un local; el votante ya fue identificado
+    en mesa y debe estar empadronado en el distrito del local.
+    """
+    data = request.get_json()
 
-    # Validar si ya votó
-    existing_vote = Vote.query.filter_by(user_id=g.user['user_id'], section_id=section.id).first()
-    if existing_vote:
-        return jsonify({'error': 'You have already voted in this section'}), 409
+    required_fields = ['user_id', 'event_id', 'section_id', 'option_id']
+    if not data or not all(field in data for field in required_fields):
+        return jsonify({'error': 'Missing voting data'}), 400
 
-    vote = Vote(
-        user_id=g.user['user_id'],
-        option_id=option.id,
-        section_id=section.id
-    )
-    db.session.add(vote)
-    db.session.commit()
+    try:
+        vote_id = voting.cast_vote(
+            user_id=voting.check_kiosk_voter(data['user_id'], g.location_id),
+            event_id=data['event_id'],
+            section_id=data['section_id'],
+            option_id=data['option_id'],
+            location_id=g.location_id
+        )
+    except voting.VoteError as e:
+        return jsonify({'error': e.message}), e.status_code
 
+    if vote_id is None:
+        return jsonify({'message': 'Vote accepted, pending confirmation'}), 202
     return jsonify({'message': 'Vote cast successfully'}), 201
+
+
+@require_location_key
+@rate_limit(limit=10, seconds=60)
+def kiosk_vote_batch():
+    """
+    Lote de votos guardados por un kiosko mientras estuvo sin conexión.
+    Body: {"votes": [{user_id, event_id, section_id, option_id, client_timestamp, idempotency_key}, ...]}
+    Devuelve un resultado por voto; reenviar el lote no duplica votos.
+    """
+    data = request.get_json(silent=True)
+    records = data.get('votes') if isinstance(data, dict) else None
+    if not isinstance(records, list) or not records:
+        return jsonify({'error': 'Missing votes'}), 400
+
+    if len(records) > current_app.config.get('VOTE_BATCH_MAX_RECORDS', 1000):
+        return jsonify({'error': 'Too many votes in batch'}), 413
+
+    results = voting.cast_votes_batch(records, location_id=g.location_id)
+
+    accepted = sum(1 for result in results if result['outcome'] != 'rejected')
+    status = 201 if accepted == len(results) else (207 if accepted else 400)
+    return jsonify({
+        'created': sum(1 for result in results if result['outcome'] == 'created'),
+        'replayed': sum(1 for result in results if result['outcome'] == 'replayed'),
+        'rejected': len(results) - accepted,
+        'results': results
+    }), status
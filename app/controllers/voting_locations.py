@@ -1,59 +1,89 @@
 from flask import request, jsonify, g
 from app.models import db, VotingLocation
-from app.utils.security import require_api_key, jwt_required, role_required, active_user_required
+from app.utils.security import require_api_key, jwt_required, role_required, active_user_required, location_keys
+from app.utils.idempotency import idempotent
+from app.utils.pagination import paginated_response
+from app.utils.bulk import bulk_insert, bulk_response, iter_rows, BulkInputError
 import secrets
 
-@require_api_key('ADMIN_API_KEY')
-@jwt_required
-@active_user_required
-@role_required('admin')
-def create():
-    data = request.get_json()
-
+def _validate(data):
     required_fields = ['name', 'region', 'province', 'district']
     if not all(field in data for field in required_fields):
-        return jsonify({"error": "Missing required fields"}), 400
-
-    api_key = data.get('api_key') or secrets.token_hex(32)
+        return "Missing required fields"
+    return None
 
-    new_location = VotingLocation(
+def _build(data):
+    return dict(
         name=data['name'],
         coordinates=data.get('coordinates'),
         address=data.get('address'),
         region=data['region'],
         province=data['province'],
         district=data['district'],
-        api_key=api_key,
+        api_key=data.get('api_key') or secrets.token_hex(32),
         created_by=g.user['user_id']
     )
 
+@require_api_key('ADMIN_API_KEY')
+@jwt_required
+@active_user_required
+@role_required('admin')
+@idempotent
+def create():
+    data = request.get_json()
+
+    error = _validate(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    new_location = VotingLocation(**_build(data))
+
     db.session.add(new_location)
     db.session.commit()
+    location_keys.invalidate()
 
     return jsonify({
         "message": "Voting location created",
         "id": new_location.id,
-        "api_key": api_key
+        "api_key": new_location.api_key
     }), 201
 
+@require_api_key('ADMIN_API_KEY')
+@jwt_required
+@active_user_required
+@role_required('admin')
+@idempotent
+def bulk_create():
+    try:
+        created, errors = bulk_insert(
+            VotingLocation, iter_rows(), _validate, _build,
+            returning=('api_key',)
+        )
+    except BulkInputError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if created:
+        location_keys.invalidate()
+
+    body, status = bulk_response(created, errors)
+    return jsonify(body), status
+
 @require_api_key('ADMIN_API_KEY')
 @jwt_required
 @active_user_required
 @role_required('admin')
 def get_all():
-    locations = VotingLocation.query.all()
-    return jsonify([
-        {
-            "id": loc.id,
-            "name": loc.name,
-            "coordinates": loc.coordinates,
-            "address": loc.address,
-            "region": loc.region,
-            "province": loc.province,
-            "district": loc.district,
-            "api_key": loc.api_key
-        } for loc in locations
-    ]), 200
+    query = VotingLocation.query.filter(VotingLocation.status != 'deleted')
+    return paginated_response(query, VotingLocation.id, {
+        "id": VotingLocation.id,
+        "name": VotingLocation.name,
+        "coordinates": VotingLocation.coordinates,
+        "address": VotingLocation.address,
+        "region": VotingLocation.region,
+        "province": VotingLocation.province,
+        "district": VotingLocation.district,
+        "api_key": VotingLocation.api_key
+    })
 
 @require_api_key('ADMIN_API_KEY')
 @jwt_required
@@ -61,7 +91,7 @@ def get_all():
 @role_required('admin')
 def get_by_id(location_id):
     loc = VotingLocation.query.get(location_id)
-    if not loc:
+    if not loc or loc.status == 'deleted':
         return jsonify({"error": "Voting location not found"}), 404
 
     return jsonify({
@@ -81,7 +111,7 @@ def get_by_id(location_id):
 @role_required('admin')
 def update(location_id):
     loc = VotingLocation.query.get(location_id)
-    if not loc:
+    if not loc or loc.status == 'deleted':
         return jsonify({"error": "Voting location not found"}), 404
 
     data = request.get_json()
@@ -91,6 +121,7 @@ def update(location_id):
 
     loc.modified_by = g.user['user_id']
     db.session.commit()
+    location_keys.invalidate()
     return jsonify({"message": "Voting location updated"}), 200
 
 @require_api_key('ADMIN_API_KEY')
@@ -111,6 +142,7 @@ def update_status(location_id):
     location.status = new_status
     location.modified_by = g.user['user_id']
     db.session.commit()
+    location_keys.invalidate()
 
     return jsonify({"message": f"Location status updated to '{new_status}'"}), 200
 
@@ -121,9 +153,12 @@ def update_status(location_id):
 @role_required('admin')
 def delete(location_id):
     loc = VotingLocation.query.get(location_id)
-    if not loc:
+    if not loc or loc.status == 'deleted':
         return jsonify({"error": "Voting location not found"}), 404
 
-    db.session.delete(loc)
+    # Soft delete: los votos guardan el local de origen (vt_votes.voting_location_id)
+    loc.status = 'deleted'
+    loc.modified_by = g.user['user_id']
     db.session.commit()
-    return jsonify({"message": "Voting location deleted"}), 200
+    location_keys.invalidate()
+    return jsonify({"message": "Voting location deleted (soft)"}), 200
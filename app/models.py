@@ -1,8 +1,17 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import text
 from datetime import datetime, timezone
 
 db = SQLAlchemy()
 
+# Filtro de los listados: los índices parciales solo cubren filas no borradas
+NOT_DELETED = text("status <> 'deleted'")
+
+
+def live_index(name, *columns):
+    """Índice parcial sobre las filas con status <> 'deleted' (PostgreSQL y SQLite)."""
+    return db.Index(name, *columns, postgresql_where=NOT_DELETED, sqlite_where=NOT_DELETED)
+
 # 🔁 Mixin para trazabilidad de creación y modificación
 class AuditMixin(object):
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
@@ -83,6 +92,10 @@ class Event(db.Model, AuditMixin):
     # Relationship
     sections = db.relationship('Section', backref='event', lazy=True)
 
+    __table_args__ = (
+        live_index('ix_vt_events_live_id', 'id'),
+    )
+
     def __repr__(self):
         return f'<Event {self.name}>'
 
@@ -98,6 +111,11 @@ class Section(db.Model, AuditMixin):
     event_id = db.Column(db.Integer, db.ForeignKey('vt_events.id'), nullable=False)
     options = db.relationship('Option', backref='section', lazy=True)
 
+    __table_args__ = (
+        db.Index('ix_vt_sections_event_id_id', 'event_id', 'id'),
+        live_index('ix_vt_sections_live_id', 'id'),
+    )
+
     def __repr__(self):
         return f'<Section {self.name}>'
 
@@ -112,6 +130,11 @@ class Option(db.Model, AuditMixin):
     section_id = db.Column(db.Integer, db.ForeignKey('vt_sections.id'), nullable=False)
     votes = db.relationship('Vote', backref='option', lazy=True)
 
+    __table_args__ = (
+        db.Index('ix_vt_options_section_id_id', 'section_id', 'id'),
+        live_index('ix_vt_options_live_id', 'id'),
+    )
+
     def __repr__(self):
         return f'<Option {self.label}>'
 
@@ -124,10 +147,20 @@ class Vote(db.Model):
     option_id = db.Column(db.Integer, db.ForeignKey('vt_options.id'), nullable=False, index=True)
     section_id = db.Column(db.Integer, db.ForeignKey('vt_sections.id'), nullable=False, index=True)
 
+    # Local de votación (kiosko) desde donde se emitió; None si fue en línea
+    voting_location_id = db.Column(db.Integer, db.ForeignKey('vt_voting_locations.id'), nullable=True, index=True)
+
     timestamp = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), index=True)
 
+    # Lotes de kioskos sin conexión: hora del kiosko y clave para reintentos idempotentes
+    client_timestamp = db.Column(db.DateTime, nullable=True)
+    idempotency_key = db.Column(db.String(64), unique=True, nullable=True)
+
     __table_args__ = (
+        # También sirve de índice para la verificación de voto duplicado
         db.UniqueConstraint('user_id', 'section_id', name='unique_vote_per_user_per_section'),
+        # Conteo por opción (cierre de eventos) y exportaciones por sección
+        db.Index('ix_vt_votes_section_id_option_id', 'section_id', 'option_id'),
     )
 
     def __repr__(self):
@@ -142,6 +175,32 @@ class RequestLog(db.Model):
     user_id = db.Column(db.Integer, nullable=True)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
+    __table_args__ = (
+        # Ventana del rate limit durable: ip + ruta + rango de timestamp (+ usuario)
+        db.Index('ix_vt_request_logs_ip_route_timestamp', 'ip', 'route', 'timestamp', 'user_id'),
+    )
+
+
+class RequestLogArchive(db.Model):
+    """Filas de vt_request_logs ya vencidas (REQUEST_LOG_RETENTION_MODE='archive')."""
+    __tablename__ = 'vt_request_logs_archive'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    ip = db.Column(db.String(45), nullable=False)
+    route = db.Column(db.String(100), nullable=False)
+    user_id = db.Column(db.Integer, nullable=True)
+    timestamp = db.Column(db.DateTime, index=True)
+
+
+class IdempotencyRecord(db.Model):
+    """Primera respuesta de un POST con Idempotency-Key (IDEMPOTENCY_BACKEND='durable')."""
+    __tablename__ = 'vt_idempotency_keys'
+    key = db.Column(db.String(64), primary_key=True)  # sha256 de (ruta, usuario, clave)
+    fingerprint = db.Column(db.String(64), nullable=False)  # sha256 del body del request
+    status_code = db.Column(db.Integer, nullable=False)
+    content_type = db.Column(db.String(100), nullable=True)
+    body = db.Column(db.LargeBinary, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
 
 class VotingLocation(db.Model, AuditMixin):
     __tablename__ = 'vt_voting_locations'
@@ -156,4 +215,62 @@ class VotingLocation(db.Model, AuditMixin):
     api_key = db.Column(db.String(64), unique=True, nullable=False)
 
     def __repr__(self):
-        return f"<VotingLocation {self.name}>"
\ No newline at end of file
+        return f"<VotingLocation {self.name}>"
+
+
+class VoteRollup(db.Model):
+    """
+    Conteo precalculado por (evento, sección, opción, región, provincia,
+    distrito), repartido en VOTE_ROLLUP_SHARDS filas por bucket (shard =
+    user_id % VOTE_ROLLUP_SHARDS) para que los votos simultáneos de un mismo
+    distrito no se serialicen sobre una sola fila. Las lecturas suman los shards.
+    """
+    __tablename__ = 'vt_vote_rollups'
+    id = db.Column(db.Integer, primary_key=True)
+
+    event_id = db.Column(db.Integer, db.ForeignKey('vt_events.id'), nullable=False)
+    section_id = db.Column(db.Integer, db.ForeignKey('vt_sections.id'), nullable=False)
+    option_id = db.Column(db.Integer, db.ForeignKey('vt_options.id'), nullable=False)
+
+    # '' cuando el votante no tiene el dato (los NULL no sirven en el unique)
+    region = db.Column(db.String(50), nullable=False, default='')
+    province = db.Column(db.String(50), nullable=False, default='')
+    district = db.Column(db.String(50), nullable=False, default='')
+    shard = db.Column(db.SmallInteger, nullable=False, default=0)
+
+    votes = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('event_id', 'section_id', 'option_id', 'region', 'province', 'district', 'shard',
+                            name='unique_rollup_bucket'),
+    )
+
+    def __repr__(self):
+        return f'<VoteRollup event={self.event_id} option={self.option_id} {self.district}={self.votes}>'
+
+
+class VoteTally(db.Model):
+    """
+    Conteo por opción de cada evento, sumado voto a voto en la misma
+    transacción que inserta el voto (services.tally) y repartido en
+    VOTE_TALLY_SHARDS filas por opción. Se precrea en cero al abrir el evento
+    y se congela (frozen=True) al cerrarlo.
+    """
+    __tablename__ = 'vt_vote_tallies'
+    id = db.Column(db.Integer, primary_key=True)
+
+    event_id = db.Column(db.Integer, db.ForeignKey('vt_events.id'), nullable=False)
+    section_id = db.Column(db.Integer, db.ForeignKey('vt_sections.id'), nullable=False)
+    option_id = db.Column(db.Integer, db.ForeignKey('vt_options.id'), nullable=False)
+    shard = db.Column(db.SmallInteger, nullable=False, default=0)
+
+    votes = db.Column(db.Integer, nullable=False, default=0)
+    frozen = db.Column(db.Boolean, nullable=False, default=False)
+    frozen_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.UniqueConstraint('event_id', 'section_id', 'option_id', 'shard', name='unique_tally_per_shard'),
+    )
+
+    def __repr__(self):
+        return f'<VoteTally event={self.event_id} option={self.option_id} votes={self.votes}>'
@@ -1,20 +1,27 @@
 from flask import Blueprint
-from app.controllers import admin, auth, votes, events, sections, options, voting_locations
+from app.controllers import admin, auth, votes, events, sections, options, voting_locations, exports, voter_roll
 
 votario = Blueprint('votario', __name__)
 
 # Admin routes
 votario.add_url_rule('/', view_func=admin.home)
 votario.add_url_rule('/admin/seed', view_func=admin.seed_roles, methods=['POST'])
+votario.add_url_rule('/admin/stats', view_func=admin.stats, methods=['GET'])
+votario.add_url_rule('/metrics', view_func=admin.metrics, methods=['GET'])
 
 # Auth routes
 votario.add_url_rule('/auth/protected', view_func=auth.protected_route, methods=['GET'])
 votario.add_url_rule('/auth/register', view_func=auth.register, methods=['POST'])
 votario.add_url_rule('/auth/login', view_func=auth.login, methods=['POST'])
 votario.add_url_rule('/auth/seed', view_func=auth.seed_users, methods=['POST'])
+votario.add_url_rule('/auth/password/token', view_func=auth.password_token, methods=['POST'])
+votario.add_url_rule('/auth/password/reset', view_func=auth.reset_password, methods=['POST'])
+votario.add_url_rule('/voters/import', view_func=voter_roll.import_roll, methods=['POST'])
 
 # voting routes
 votario.add_url_rule('/vote', view_func=votes.cast_vote, methods=['POST'])
+votario.add_url_rule('/kiosk/vote', view_func=votes.kiosk_vote, methods=['POST'])
+votario.add_url_rule('/votes/batch', view_func=votes.kiosk_vote_batch, methods=['POST'])
 
 # events
 votario.add_url_rule('/events', view_func=events.create, methods=['POST'], endpoint='create_event')
@@ -23,9 +30,14 @@ votario.add_url_rule('/events/<int:event_id>', view_func=events.get_by_id, metho
 votario.add_url_rule('/events/<int:event_id>', view_func=events.update, methods=['PUT'], endpoint='update_event')
 votario.add_url_rule('/events/<int:event_id>/status', view_func=events.update_status, methods=['PATCH'], endpoint='update_status_event')
 votario.add_url_rule('/events/<int:event_id>', view_func=events.delete, methods=['DELETE'], endpoint='delete_event')
+votario.add_url_rule('/events/<int:event_id>/results', view_func=events.results, methods=['GET'], endpoint='event_results')
+votario.add_url_rule('/events/<int:event_id>/export/votes', view_func=exports.votes, methods=['GET'], endpoint='export_event_votes')
+votario.add_url_rule('/events/<int:event_id>/export/results', view_func=exports.results, methods=['GET'], endpoint='export_event_results')
+votario.add_url_rule('/events/<int:event_id>/results/geography', view_func=events.results_by_geography, methods=['GET'], endpoint='event_results_by_geography')
 
 # sections
 votario.add_url_rule('/sections', view_func=sections.create, methods=['POST'], endpoint='create_section')
+votario.add_url_rule('/sections/bulk', view_func=sections.bulk_create, methods=['POST'], endpoint='bulk_create_section')
 votario.add_url_rule('/sections', view_func=sections.get_all, methods=['GET'], endpoint='get_all_section')
 votario.add_url_rule('/sections/<int:section_id>', view_func=sections.get_by_id, methods=['GET'], endpoint='get_section_by_id')
 votario.add_url_rule('/sections/<int:section_id>', view_func=sections.update, methods=['PUT'], endpoint='update_section')
@@ -34,6 +46,7 @@ votario.add_url_rule('/sections/<int:section_id>', view_func=sections.delete, me
 
 # options
 votario.add_url_rule('/options', view_func=options.create, methods=['POST'], endpoint='create_option')
+votario.add_url_rule('/options/bulk', view_func=options.bulk_create, methods=['POST'], endpoint='bulk_create_option')
 votario.add_url_rule('/options', view_func=options.get_all, methods=['GET'], endpoint='get_all_option')
 votario.add_url_rule('/options/<int:option_id>', view_func=options.get_by_id, methods=['GET'], endpoint='get_option_by_id')
 votario.add_url_rule('/options/<int:option_id>', view_func=options.update, methods=['PUT'], endpoint='update_option')
@@ -42,8 +55,9 @@ votario.add_url_rule('/options/<int:option_id>', view_func=options.delete, metho
 
 # voting locations
 votario.add_url_rule('/locations', view_func=voting_locations.create, methods=['POST'], endpoint='create_voting_location')
+votario.add_url_rule('/locations/bulk', view_func=voting_locations.bulk_create, methods=['POST'], endpoint='bulk_create_voting_location')
 votario.add_url_rule('/locations', view_func=voting_locations.get_all, methods=['GET'], endpoint='get_all_voting_location')
-votario.add_url_rule('/locations/<int:option_id>', view_func=voting_locations.get_by_id, methods=['GET'], endpoint='get_voting_location')
-votario.add_url_rule('/locations/<int:option_id>', view_func=voting_locations.update, methods=['PUT'], endpoint='update_voting_location')
-votario.add_url_rule('/locations/<int:option_id>/status', view_func=voting_locations.update_status, methods=['PATCH'], endpoint='update_status_voting_location')
-votario.add_url_rule('/locations/<int:option_id>', view_func=voting_locations.delete, methods=['DELETE'], endpoint='delete_voting_location')
\ No newline at end of file
+votario.add_url_rule('/locations/<int:location_id>', view_func=voting_locations.get_by_id, methods=['GET'], endpoint='get_voting_location')
+votario.add_url_rule('/locations/<int:location_id>', view_func=voting_locations.update, methods=['PUT'], endpoint='update_voting_location')
+votario.add_url_rule('/locations/<int:location_id>/status', view_func=voting_locations.update_status, methods=['PATCH'], endpoint='update_status_voting_location')
+votario.add_url_rule('/locations/<int:location_id>', view_func=voting_locations.delete, methods=['DELETE'], endpoint='delete_voting_location')
\ No newline at end of file
@@ -0,0 +1,116 @@
+from collections import OrderedDict, namedtuple
+import threading
+import time
+from app.models import db, Event, Section, Option
+
+# Ventana del evento y mapa {section_id: frozenset(option_ids)} válidos
+Ballot = namedtuple('Ballot', ['event_id', 'start_datetime', 'end_datetime', 'sections'])
+
+
+class BallotCache:
+    """
+    Cache read-through de la papeleta de cada evento, con TTL y desalojo LRU.
+    - BALLOT_CACHE_TTL: segundos que vive una entrada (por defecto 30).
+    - BALLOT_CACHE_SIZE: número máximo de eventos en memoria (por defecto 256).
+    Los handlers de administración llaman a invalidate() al modificar
+    eventos, secciones u opciones.
+    """
+
+    def __init__(self, app=None, ttl=30, max_size=256):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config.setdefault('BALLOT_CACHE_TTL', self.ttl)
+        self.max_size = app.config.setdefault('BALLOT_CACHE_SIZE', self.max_size)
+        app.extensions['ballot_cache'] = self
+
+    def get(self, event_id):
+        """Devuelve el Ballot del evento o None si el evento no existe."""
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(event_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(event_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            version = self._version
+
+        ballot = self._load(event_id)
+        if ballot is None:
+            return None
+
+        with self._lock:
+            # Si hubo una invalidación durante la carga, no guardamos datos viejos
+            if version == self._version:
+                self._entries[event_id] = (now + self.ttl, ballot)
+                self._entries.move_to_end(event_id)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+
+        return ballot
+
+    def invalidate(self, event_id=None):
+        """Descarta la papeleta de un evento (o todas si event_id es None)."""
+        with self._lock:
+            self._version += 1
+            if event_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(event_id, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries)
+            }
+
+    def _load(self, event_id):
+        # Una sola consulta: evento con todas sus secciones y opciones
+        rows = db.session.query(
+            Event.start_datetime,
+            Event.end_datetime,
+            Section.id,
+            Option.id
+        ).select_from(Event).\
+            outerjoin(Section, Section.event_id == Event.id).\
+            outerjoin(Option, Option.section_id == Section.id).\
+            filter(Event.id == event_id).\
+            all()
+
+        if not rows:
+            return None
+
+        sections = {}
+        for _, _, section_id, option_id in rows:
+            if section_id is None:
+                continue
+            options = sections.setdefault(section_id, set())
+            if option_id is not None:
+                options.add(option_id)
+
+        start, end = rows[0][0], rows[0][1]
+        return Ballot(
+            event_id=event_id,
+            start_datetime=start,
+            end_datetime=end,
+            sections={section_id: frozenset(options) for section_id, options in sections.items()}
+        )
+
+
+ballot_cache = BallotCache()
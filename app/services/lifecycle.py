@@ -0,0 +1,313 @@
+from datetime import datetime
+import heapq
+import itertools
+import logging
+import threading
+import time
+from sqlalchemy import or_, exists, inspect
+from app.models import db, Event, User, Role, VoteTally
+from app.services import rollups
+from app.services.ballot_cache import ballot_cache
+from app.services.tally import tally
+from app.services.voting import upload_deadline, upload_lag
+from app.utils.security import user_status_cache
+
+logger = logging.getLogger(__name__)
+
+OPEN = 'open'
+CLOSE = 'close'
+
+
+class EventScheduler:
+    """
+    Ejecuta trabajo en los bordes de la ventana de cada evento:
+    - al abrir: precarga la papeleta y el status de los votantes del ámbito
+      del evento en los caches, y precrea en cero las filas de vt_vote_tallies
+      (las opciones agregadas después reciben su fila al cerrar);
+    - al cerrar, pasado el plazo de subida de lotes de kioskos
+      (voting.upload_deadline): congela las filas de vt_vote_tallies, que ya
+      tienen el conteo exacto, y desde ahí ya no se aceptan votos ni lotes.
+    Un voto que igual se confirme con el conteo congelado (una carrera en el
+    borde) se suma a su fila como cualquier otro, queda en el log y vuelve a
+    congelar el evento por si creó una fila nueva. Los handlers de eventos llaman a arm()
+    al crear o modificar un evento; cada worker además relee la tabla de
+    eventos y el estado congelado de vt_vote_tallies cada
+    EVENT_SCHEDULER_RESYNC segundos para ver los cambios hechos en otros workers.
+    - EVENT_SCHEDULER_ENABLED: programa las transiciones; el hilo lo arranca
+      app.start_background_jobs (los puntos de entrada del servidor).
+    - EVENT_REFREEZE_DELAY: segundos que se agrupan votos tardíos antes de
+      volver a congelar.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        self._queue = []  # (when, seq, event_id, kind, generation)
+        self._generations = {}
+        self._windows = {}
+        self._refreeze_pending = set()
+        self._seq = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stop = False
+        self.opened = 0
+        self.closed = 0
+        self.refrozen = 0
+        self.failures = 0
+        self.last_run_at = None
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.setdefault('EVENT_SCHEDULER_ENABLED', True)
+        self.resync = app.config.setdefault('EVENT_SCHEDULER_RESYNC', 60)
+        self.refreeze_delay = app.config.setdefault('EVENT_REFREEZE_DELAY', 1.0)
+        app.extensions['event_scheduler'] = self
+
+        tally.add_listener(self._on_vote)
+
+    # Programación
+
+    def arm(self, event, force=False):
+        """
+        (Re)programa la apertura y el cierre de `event` según su ventana
+        actual. Si la ventana no cambió desde la última vez no hace nada,
+        salvo con force=True.
+        """
+        if not self.enabled:
+            return
+
+        now = datetime.utcnow()
+        window = (event.start_datetime, event.end_datetime, event.status)
+        with self._condition:
+            if not force and self._windows.get(event.id) == window:
+                return
+            self._windows[event.id] = window
+            generation = self._generations.get(event.id, 0) + 1
+            self._generations[event.id] = generation
+            if event.status == 'deleted':
+                return
+
+            if event.end_datetime > now:
+                self._push(max(event.start_datetime, now), event.id, OPEN, generation)
+            self._push(max(upload_deadline(event.end_datetime), now), event.id, CLOSE, generation)
+            self._condition.notify()
+
+    def arm_all(self):
+        """Programa los eventos abiertos o futuros y los cerrados que aún no se congelaron."""
+        # Los cerrados hace menos del plazo de subida todavía pueden recibir lotes
+        since = datetime.utcnow() - upload_lag()
+        frozen = exists().where(VoteTally.event_id == Event.id, VoteTally.frozen.is_(True))
+        events = Event.query.filter(
+            Event.status != 'deleted',
+            or_(Event.end_datetime > since, ~frozen)
+        ).all()
+        for event in events:
+            self.arm(event)
+        return len(events)
+
+    def _push(self, when, event_id, kind, generation):
+        delay = (when - datetime.utcnow()).total_seconds()
+        heapq.heappush(self._queue, (time.monotonic() + max(delay, 0), next(self._seq), event_id, kind, generation))
+
+    def _on_vote(self, event_id, section_id, option_id, delta):
+        # Un voto confirmado en un evento congelado: vuelve a contar en un rato
+        if not self.enabled or not tally.is_frozen(event_id):
+            return
+        with self._condition:
+            if event_id in self._refreeze_pending:
+                return
+            logger.warning('Vote recorded for frozen event %d; refreezing its tally', event_id)
+            self._refreeze_pending.add(event_id)
+            generation = self._generations.get(event_id, 0)
+            heapq.heappush(self._queue, (
+                time.monotonic() + self.refreeze_delay, next(self._seq), event_id, CLOSE, generation
+            ))
+            self._condition.notify()
+
+    # Hilo
+
+    def start(self):
+        with self._condition:
+            if self._thread is None:
+                self._stop = False
+                self._thread = threading.Thread(target=self._run, name='event-scheduler', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._stop = True
+            self._condition.notify()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+
+    def _run(self):
+        next_resync = time.monotonic()
+        while True:
+            with self._condition:
+                while not self._stop:
+                    now = time.monotonic()
+                    if now >= next_resync or (self._queue and self._queue[0][0] <= now):
+                        break
+                    wake = next_resync if not self._queue else min(next_resync, self._queue[0][0])
+                    self._condition.wait(wake - now)
+                if self._stop:
+                    return
+
+                due = []
+                if time.monotonic() >= next_resync:
+                    resync = True
+                    next_resync = time.monotonic() + self.resync
+                else:
+                    resync = False
+                    _, _, event_id, kind, generation = heapq.heappop(self._queue)
+                    if generation == self._generations.get(event_id):
+                        due.append((event_id, kind))
+                    if kind == CLOSE:
+                        self._refreeze_pending.discard(event_id)
+
+            with self.app.app_context():
+                try:
+                    # Sin tablas todavía (flask init-db, base nueva): se intenta en el próximo resync
+                    if resync and inspect(db.engine).has_table(Event.__tablename__):
+                        self.arm_all()
+                        # Cierres, reaperturas y recongelamientos hechos por otros workers
+                        tally.sync_frozen()
+                    for event_id, kind in due:
+                        self.run(event_id, kind)
+                except Exception:
+                    db.session.rollback()
+                    with self._condition:
+                        self.failures += 1
+                    logger.exception('Event scheduler run failed')
+                finally:
+                    db.session.remove()
+
+    def run(self, event_id, kind):
+        """Ejecuta la transición si la ventana guardada en la base todavía la justifica."""
+        event = db.session.get(Event, event_id)
+        if event is None or event.status == 'deleted':
+            return
+
+        now = datetime.utcnow()
+        if kind == OPEN and event.start_datetime <= now < event.end_datetime:
+            self.open(event)
+        elif kind == CLOSE and upload_deadline(event.end_datetime) <= now:
+            self.close(event)
+        else:
+            # La ventana cambió en otro worker después de programar
+            self.arm(event, force=True)
+
+    # Transiciones
+
+    def open(self, event):
+        ballot_cache.invalidate(event.id)
+        ballot = ballot_cache.get(event.id)
+
+        # Un evento reabierto (se amplió su ventana) vuelve al conteo en vivo
+        VoteTally.query.filter_by(event_id=event.id, frozen=True).\
+            update({'frozen': False, 'frozen_at': None}, synchronize_session=False)
+        _store_tallies(event.id, ballot)
+        db.session.commit()
+
+        # Siempre: otro worker pudo haberlo descongelado antes y este seguir
+        # creyéndolo congelado
+        tally.invalidate(event.id)
+        warmed = self._warm_eligibility(event)
+
+        with self._condition:
+            self.opened += 1
+            self.last_run_at = datetime.utcnow()
+        logger.info('Opened event %d (%d voters preloaded)', event.id, warmed)
+
+    def close(self, event):
+        refreeze = tally.is_frozen(event.id)
+        ballot_cache.invalidate(event.id)
+        ballot = ballot_cache.get(event.id)
+
+        # Las filas ya tienen el conteo exacto: solo faltan las opciones sin votos
+        frozen_at = datetime.utcnow()
+        _store_tallies(event.id, ballot)
+        VoteTally.query.filter_by(event_id=event.id).\
+            update({'frozen': True, 'frozen_at': frozen_at}, synchronize_session=False)
+        db.session.commit()
+        tally.freeze(event.id, frozen_at)
+        total = sum(tally.counts(event.id).values())
+
+        with self._condition:
+            if refreeze:
+                self.refrozen += 1
+            else:
+                self.closed += 1
+            self.last_run_at = frozen_at
+        logger.info('Closed event %d with %d votes', event.id, total)
+
+    def _warm_eligibility(self, event):
+        query = db.session.query(User.id, User.status).\
+            join(Role, User.role_id == Role.id).\
+            filter(Role.name == 'voter')
+        # Mismo ámbito geográfico que el evento (los campos vacíos no filtran)
+        for level in rollups.LEVELS:
+            value = getattr(event, level)
+            if value:
+                query = query.filter(getattr(User, level) == value)
+
+        warmed = 0
+        # Con el TTL del propio cache (USER_STATUS_CACHE_TTL): uno más largo
+        # demoraría en los demás workers los bloqueos y desactivaciones
+        for user_id, status in query.limit(user_status_cache.max_size).yield_per(1000):
+            user_status_cache.set(user_id, status)
+            warmed += 1
+        return warmed
+
+    def stats(self):
+        with self._condition:
+            pending = [entry for entry in self._queue if entry[4] == self._generations.get(entry[2])]
+            return {
+                'enabled': self.enabled,
+                'scheduled': len(pending),
+                'next_run_in_seconds': round(min(pending)[0] - time.monotonic(), 3) if pending else None,
+                'opened': self.opened,
+                'closed': self.closed,
+                'refrozen': self.refrozen,
+                'failures': self.failures,
+                'last_run_at': self.last_run_at.isoformat() if self.last_run_at else None
+            }
+
+
+def _store_tallies(event_id, ballot):
+    """Precrea en cero (shard 0) las filas de vt_vote_tallies que falten para la papeleta."""
+    rows = [
+        {'event_id': event_id, 'section_id': section_id, 'option_id': option_id, 'shard': 0, 'votes': 0}
+        for section_id, option_ids in ballot.sections.items()
+        for option_id in option_ids
+    ]
+    if not rows:
+        return
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        existing = set(
+            db.session.query(VoteTally.section_id, VoteTally.option_id).
+            filter(VoteTally.event_id == event_id, VoteTally.shard == 0)
+        )
+        db.session.add_all(
+            VoteTally(**row) for row in rows
+            if (row['section_id'], row['option_id']) not in existing
+        )
+        return
+
+    statement = insert(VoteTally).on_conflict_do_nothing(
+        index_elements=['event_id', 'section_id', 'option_id', 'shard']
+    )
+    db.session.execute(statement, rows)
+
+
+event_scheduler = EventScheduler()
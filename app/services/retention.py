@@ -0,0 +1,228 @@
+from datetime import datetime, timedelta
+import logging
+import threading
+import time
+from sqlalchemy import select, text
+from app.models import db, RequestLog, RequestLogArchive
+from app.utils.ratelimit import max_window
+
+logger = logging.getLogger(__name__)
+
+PARTITION_PREFIX = 'vt_request_logs_p'
+
+
+class RequestLogRetention:
+    """
+    Poda periódica de vt_request_logs: borra (o archiva) las filas más viejas
+    que la ventana de rate limit más larga, en lotes acotados.
+    - REQUEST_LOG_RETENTION_ENABLED: habilita el hilo de poda (por defecto,
+      solo si RATELIMIT_BACKEND='durable'). El hilo lo arrancan los puntos de
+      entrada del servidor (app.start_background_jobs), no create_app, así
+      que la CLI y los benchmarks no podan.
+    - REQUEST_LOG_RETENTION_MODE: 'delete', 'archive' o 'partition'
+      (PostgreSQL: descarta particiones diarias completas).
+    - REQUEST_LOG_RETENTION_INTERVAL: segundos entre ejecuciones.
+    - REQUEST_LOG_RETENTION_BATCH: filas por lote de borrado.
+    - REQUEST_LOG_RETENTION_GRACE: segundos extra que se conservan.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.rows_total = 0
+        self.last_rows = 0
+        self.last_duration = 0.0
+        self.last_run_at = None
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.mode = app.config.setdefault('REQUEST_LOG_RETENTION_MODE', 'delete')
+        self.interval = app.config.setdefault('REQUEST_LOG_RETENTION_INTERVAL', 300)
+        self.batch_size = app.config.setdefault('REQUEST_LOG_RETENTION_BATCH', 5000)
+        self.grace = app.config.setdefault('REQUEST_LOG_RETENTION_GRACE', 0)
+        self.enabled = app.config.setdefault(
+            'REQUEST_LOG_RETENTION_ENABLED',
+            app.config.get('RATELIMIT_BACKEND') == 'durable'
+        )
+        app.extensions['request_log_retention'] = self
+
+        if self.mode not in ('delete', 'archive', 'partition'):
+            raise ValueError(f'Unknown REQUEST_LOG_RETENTION_MODE: {self.mode}')
+
+    def cutoff(self):
+        return datetime.utcnow() - timedelta(seconds=max_window() + self.grace)
+
+    def prune(self):
+        """Ejecuta una poda completa. Devuelve las filas eliminadas."""
+        start = time.perf_counter()
+
+        if self.mode == 'partition':
+            rows = drop_expired_partitions(self.cutoff())
+        else:
+            rows = self._prune_batches(self.cutoff(), archive=self.mode == 'archive')
+
+        duration = time.perf_counter() - start
+        with self._lock:
+            self.runs += 1
+            self.rows_total += rows
+            self.last_rows = rows
+            self.last_duration = duration
+            self.last_run_at = datetime.utcnow()
+
+        logger.info('Pruned %d request log rows in %.3fs', rows, duration)
+        return rows
+
+    def _prune_batches(self, cutoff, archive=False):
+        pruned = 0
+        while True:
+            ids = [row[0] for row in db.session.query(RequestLog.id).
+                   filter(RequestLog.timestamp < cutoff).
+                   order_by(RequestLog.id).
+                   limit(self.batch_size).all()]
+            if not ids:
+                break
+
+            if archive:
+                columns = ['id', 'ip', 'route', 'user_id', 'timestamp']
+                source = select(*[getattr(RequestLog, name) for name in columns]).\
+                    where(RequestLog.id.in_(ids))
+                db.session.execute(db.insert(RequestLogArchive).from_select(columns, source))
+
+            RequestLog.query.filter(RequestLog.id.in_(ids)).delete(synchronize_session=False)
+            db.session.commit()
+            pruned += len(ids)
+
+            if len(ids) < self.batch_size:
+                break
+
+        return pruned
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='request-log-retention', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+
+    def _run(self):
+        # La primera pasada va al arrancar: en modo 'partition' las particiones
+        # de hoy y mañana tienen que existir antes de que lleguen requests
+        while not self._stop.is_set():
+            with self.app.app_context():
+                try:
+                    if self.mode == 'partition':
+                        ensure_partitions()
+                    self.prune()
+                except Exception:
+                    db.session.rollback()
+                    logger.exception('Request log retention run failed')
+                finally:
+                    db.session.remove()
+            self._stop.wait(self.interval)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'mode': self.mode,
+                'runs': self.runs,
+                'rows_pruned_total': self.rows_total,
+                'last_rows_pruned': self.last_rows,
+                'last_duration_seconds': round(self.last_duration, 6),
+                'last_run_at': self.last_run_at.isoformat() if self.last_run_at else None
+            }
+
+
+# Particiones por día (solo PostgreSQL)
+
+def create_partitioned_table():
+    """
+    Crea vt_request_logs particionada por rango de timestamp. Debe ejecutarse
+    antes de create_all (o sobre una base nueva); si ya existe una tabla sin
+    particionar hay que migrar sus filas a mano.
+    """
+    _require_postgresql()
+    db.session.execute(text('''
+        CREATE TABLE IF NOT EXISTS vt_request_logs (
+            id SERIAL,
+            ip VARCHAR(45) NOT NULL,
+            route VARCHAR(100) NOT NULL,
+            user_id INTEGER,
+            timestamp TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+            PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+    '''))
+    db.session.execute(text(
+        'CREATE INDEX IF NOT EXISTS ix_vt_request_logs_ip ON vt_request_logs (ip)'
+    ))
+    db.session.execute(text(
+        'CREATE INDEX IF NOT EXISTS ix_vt_request_logs_timestamp ON vt_request_logs (timestamp)'
+    ))
+    db.session.execute(text(
+        'CREATE INDEX IF NOT EXISTS ix_vt_request_logs_ip_route_timestamp '
+        'ON vt_request_logs (ip, route, timestamp, user_id)'
+    ))
+    db.session.commit()
+    ensure_partitions()
+
+
+def ensure_partitions(days_ahead=2):
+    """Crea las particiones diarias de hoy y de los próximos `days_ahead` días."""
+    _require_postgresql()
+    today = datetime.utcnow().date()
+    for offset in range(days_ahead + 1):
+        day = today + timedelta(days=offset)
+        db.session.execute(text(
+            f'CREATE TABLE IF NOT EXISTS {PARTITION_PREFIX}{day:%Y%m%d} '
+            f'PARTITION OF vt_request_logs '
+            f"FOR VALUES FROM ('{day.isoformat()}') TO ('{(day + timedelta(days=1)).isoformat()}')"
+        ))
+    db.session.commit()
+
+
+def drop_expired_partitions(cutoff):
+    """Elimina las particiones cuyo día terminó antes de `cutoff`. Devuelve las filas descartadas."""
+    _require_postgresql()
+    partitions = db.session.execute(text('''
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON pg_inherits.inhparent = parent.oid
+        JOIN pg_class child ON pg_inherits.inhrelid = child.oid
+        WHERE parent.relname = 'vt_request_logs'
+    ''')).scalars().all()
+
+    dropped = 0
+    for name in partitions:
+        try:
+            day = datetime.strptime(name[len(PARTITION_PREFIX):], '%Y%m%d')
+        except ValueError:
+            continue
+        if day + timedelta(days=1) > cutoff:
+            continue
+
+        dropped += db.session.execute(text(f'SELECT count(*) FROM {name}')).scalar()
+        db.session.execute(text(f'DROP TABLE {name}'))
+
+    db.session.commit()
+    return dropped
+
+
+def _require_postgresql():
+    if db.session.get_bind().dialect.name != 'postgresql':
+        raise RuntimeError('Request log partitions require PostgreSQL')
+
+
+request_log_retention = RequestLogRetention()
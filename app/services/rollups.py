@@ -0,0 +1,166 @@
+from collections import defaultdict
+from flask import current_app
+from sqlalchemy import select, func, literal, Integer
+from app.models import db, User, Vote, Section, VoteRollup
+
+BUCKET_COLUMNS = ['event_id', 'section_id', 'option_id', 'region', 'province', 'district', 'shard']
+LEVELS = ['region', 'province', 'district']
+
+
+def _upsert(dialect):
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert
+
+
+def _geography_columns():
+    return [
+        func.coalesce(User.region, ''),
+        func.coalesce(User.province, ''),
+        func.coalesce(User.district, '')
+    ]
+
+
+def _shard_column(user_id):
+    return user_id % current_app.config.get('VOTE_ROLLUP_SHARDS', 16)
+
+
+def _geography(user_ids):
+    columns = _geography_columns() + [_shard_column(User.id)]
+    return db.session.query(*columns, func.count(User.id)).\
+        filter(User.id.in_(user_ids)).\
+        group_by(*columns)
+
+
+def record_votes(votes):
+    """
+    Suma votos recién insertados a vt_vote_rollups, dentro de la transacción
+    del llamador (no hace commit).
+    - votes: iterable de (event_id, section_id, option_id, user_id).
+    Una sentencia INSERT ... SELECT ... ON CONFLICT por opción votada; cada
+    voto cae en el shard user_id % VOTE_ROLLUP_SHARDS de su bucket.
+    """
+    if not current_app.config.get('VOTE_ROLLUPS_ENABLED', True):
+        return
+
+    by_option = defaultdict(list)
+    for event_id, section_id, option_id, user_id in votes:
+        by_option[(event_id, section_id, option_id)].append(user_id)
+
+    insert = _upsert(db.session.get_bind().dialect.name)
+
+    for (event_id, section_id, option_id), user_ids in by_option.items():
+        if insert is None:
+            _record_without_upsert(event_id, section_id, option_id, user_ids)
+            continue
+
+        columns = _geography_columns() + [_shard_column(User.id)]
+        source = select(
+            literal(event_id, Integer),
+            literal(section_id, Integer),
+            literal(option_id, Integer),
+            *columns,
+            func.count(User.id)
+        ).where(User.id.in_(user_ids)).group_by(*columns)
+        statement = insert(VoteRollup).from_select(BUCKET_COLUMNS + ['votes'], source)
+        statement = statement.on_conflict_do_update(
+            index_elements=BUCKET_COLUMNS,
+            set_={'votes': VoteRollup.votes + statement.excluded.votes}
+        )
+        db.session.execute(statement)
+
+
+def _record_without_upsert(event_id, section_id, option_id, user_ids):
+    for region, province, district, shard, total in _geography(user_ids).all():
+        updated = VoteRollup.query.filter_by(
+            event_id=event_id, section_id=section_id, option_id=option_id,
+            region=region, province=province, district=district, shard=shard
+        ).update({VoteRollup.votes: VoteRollup.votes + total}, synchronize_session=False)
+
+        if not updated:
+            db.session.add(VoteRollup(
+                event_id=event_id, section_id=section_id, option_id=option_id,
+                region=region, province=province, district=district, shard=shard, votes=total
+            ))
+
+
+def rebuild(event_id=None):
+    """
+    Recalcula los rollups (de un evento o de todos) desde vt_votes y hace commit.
+    Devuelve el número de buckets escritos.
+    """
+    delete = VoteRollup.query
+    if event_id is not None:
+        delete = delete.filter(VoteRollup.event_id == event_id)
+    delete.delete(synchronize_session=False)
+
+    columns = _geography_columns() + [_shard_column(Vote.user_id)]
+    source = select(
+        Section.event_id,
+        Vote.section_id,
+        Vote.option_id,
+        *columns,
+        func.count(Vote.id)
+    ).join(Section, Vote.section_id == Section.id).\
+        join(User, Vote.user_id == User.id).\
+        group_by(Section.event_id, Vote.section_id, Vote.option_id, *columns)
+    if event_id is not None:
+        source = source.where(Section.event_id == event_id)
+
+    result = db.session.execute(
+        db.insert(VoteRollup).from_select(BUCKET_COLUMNS + ['votes'], source)
+    )
+    db.session.commit()
+
+    return result.rowcount
+
+
+def results_by_geography(event_id, level='district', section_id=None, filters=None):
+    """
+    Resultados y votos emitidos por zona, leídos solo de vt_vote_rollups
+    (sumando los shards de cada bucket).
+    - level: 'region', 'province' o 'district'.
+    - filters: dict opcional {region, province, district} para acotar la zona.
+    """
+    group = LEVELS[:LEVELS.index(level) + 1]
+    group_columns = [getattr(VoteRollup, name) for name in group]
+
+    query = db.session.query(
+        *group_columns,
+        VoteRollup.section_id,
+        VoteRollup.option_id,
+        func.sum(VoteRollup.votes)
+    ).filter(VoteRollup.event_id == event_id)
+
+    if section_id is not None:
+        query = query.filter(VoteRollup.section_id == section_id)
+    for name, value in (filters or {}).items():
+        query = query.filter(getattr(VoteRollup, name) == value)
+
+    rows = query.group_by(*group_columns, VoteRollup.section_id, VoteRollup.option_id).\
+        order_by(*group_columns, VoteRollup.section_id, VoteRollup.option_id).\
+        all()
+
+    areas = {}
+    for row in rows:
+        area_key = tuple(row[:len(group)])
+        section, option, votes = row[len(group):]
+
+        area = areas.get(area_key)
+        if area is None:
+            area = {name: value or None for name, value in zip(group, area_key)}
+            area['sections'] = {}
+            areas[area_key] = area
+
+        entry = area['sections'].setdefault(section, {'section_id': section, 'votes': 0, 'options': []})
+        entry['votes'] += votes
+        entry['options'].append({'option_id': option, 'votes': votes})
+
+    for area in areas.values():
+        area['sections'] = list(area['sections'].values())
+
+    return list(areas.values())
@@ -0,0 +1,196 @@
+from collections import Counter
+import threading
+from sqlalchemy import func, select, literal, text, Boolean, DateTime
+from app.models import db, Section, Vote, VoteTally
+
+
+class TallyEngine:
+    """
+    Conteo de votos por opción de cada sección, guardado en vt_vote_tallies
+    y por eso compartido por todos los workers:
+    - record_votes() suma los votos nuevos dentro de la transacción que los
+      inserta, así el conteo nunca se adelanta ni se atrasa respecto de
+      vt_votes. Cada opción se reparte en VOTE_TALLY_SHARDS filas (shard =
+      user_id % VOTE_TALLY_SHARDS) para que los votos simultáneos no se
+      serialicen sobre una sola fila.
+    - counts() / results() suman esas filas: O(#opciones × shards) por lectura,
+      sin volver a contar vt_votes.
+    - record() avisa a los listeners (sockets, scheduler) después del commit.
+    - rebuild() recalcula las filas de un evento desde vt_votes (reparación).
+    services.lifecycle congela las filas al cerrar el evento (frozen=True);
+    cada worker guarda en memoria el frozen_at de cada evento (False si no
+    está congelado) y el scheduler lo compara con la base en cada resync
+    (sync_frozen) para ver los cierres y reaperturas hechos en otros workers.
+    """
+
+    def __init__(self, app=None):
+        self.shards = 16
+        self._frozen = {}
+        self._lock = threading.Lock()
+        self._listeners = []
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.shards = app.config.setdefault('VOTE_TALLY_SHARDS', 16)
+        app.extensions['tally'] = self
+
+    def add_listener(self, callback):
+        """Registra callback(event_id, section_id, option_id, delta) para cada voto."""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def record_votes(self, votes):
+        """
+        Suma votos recién insertados a vt_vote_tallies, dentro de la
+        transacción del llamador (no hace commit).
+        - votes: iterable de (event_id, section_id, option_id, user_id).
+        """
+        totals = Counter(
+            (event_id, section_id, option_id, user_id % self.shards)
+            for event_id, section_id, option_id, user_id in votes
+        )
+        if not totals:
+            return
+
+        rows = [
+            {'event_id': event_id, 'section_id': section_id, 'option_id': option_id, 'shard': shard, 'votes': total}
+            for (event_id, section_id, option_id, shard), total in totals.items()
+        ]
+
+        dialect = db.session.get_bind().dialect.name
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            for row in rows:
+                updated = VoteTally.query.filter_by(
+                    event_id=row['event_id'], section_id=row['section_id'],
+                    option_id=row['option_id'], shard=row['shard']
+                ).update({VoteTally.votes: VoteTally.votes + row['votes']}, synchronize_session=False)
+                if not updated:
+                    db.session.add(VoteTally(**row))
+            return
+
+        statement = insert(VoteTally)
+        statement = statement.on_conflict_do_update(
+            index_elements=['event_id', 'section_id', 'option_id', 'shard'],
+            set_={'votes': VoteTally.votes + statement.excluded.votes}
+        )
+        db.session.execute(statement, rows)
+
+    def record(self, event_id, section_id, option_id):
+        """Avisa de un voto ya confirmado (y sumado con record_votes)."""
+        for callback in self._listeners:
+            callback(event_id, section_id, option_id, 1)
+
+    def rebuild(self, event_id):
+        """
+        Reemplaza las filas del evento por un recuento de vt_votes y hace
+        commit; conserva el estado congelado. Devuelve las filas escritas.
+        Antes de contar toma el lock de escritura de vt_vote_tallies (en
+        PostgreSQL LOCK TABLE ... SHARE ROW EXCLUSIVE, en SQLite el DELETE):
+        los votos ya confirmados entran en el recuento y los que están en
+        curso esperan a que termine para sumarse a las filas nuevas, así
+        ninguno se pierde ni se cuenta dos veces.
+        """
+        if db.session.get_bind().dialect.name == 'postgresql':
+            db.session.execute(text(f'LOCK TABLE {VoteTally.__tablename__} IN SHARE ROW EXCLUSIVE MODE'))
+
+        frozen_at = db.session.query(func.max(VoteTally.frozen_at)).\
+            filter(VoteTally.event_id == event_id, VoteTally.frozen.is_(True)).\
+            scalar()
+        frozen = frozen_at is not None
+        VoteTally.query.filter(VoteTally.event_id == event_id).delete(synchronize_session=False)
+
+        shard = Vote.user_id % self.shards
+        source = select(
+            Section.event_id,
+            Vote.section_id,
+            Vote.option_id,
+            shard,
+            func.count(Vote.id),
+            literal(frozen, Boolean),
+            literal(frozen_at, DateTime)
+        ).join(Section, Vote.section_id == Section.id).\
+            where(Section.event_id == event_id).\
+            group_by(Section.event_id, Vote.section_id, Vote.option_id, shard)
+
+        result = db.session.execute(db.insert(VoteTally).from_select(
+            ['event_id', 'section_id', 'option_id', 'shard', 'votes', 'frozen', 'frozen_at'], source
+        ))
+        db.session.commit()
+        return result.rowcount
+
+    def freeze(self, event_id, frozen_at):
+        """Marca el evento como congelado (sus filas ya tienen frozen=True)."""
+        with self._lock:
+            self._frozen[event_id] = frozen_at
+
+    def is_frozen(self, event_id):
+        with self._lock:
+            frozen_at = self._frozen.get(event_id)
+        if frozen_at is None:
+            frozen_at = db.session.query(func.max(VoteTally.frozen_at)).\
+                filter(VoteTally.event_id == event_id, VoteTally.frozen.is_(True)).\
+                scalar() or False
+            with self._lock:
+                frozen_at = self._frozen.setdefault(event_id, frozen_at)
+        return frozen_at is not False
+
+    def sync_frozen(self):
+        """
+        Relee de vt_vote_tallies el frozen_at de todos los eventos congelados
+        y corrige el estado en memoria. Devuelve cuántos eventos cambiaron.
+        """
+        frozen = dict(
+            db.session.query(VoteTally.event_id, func.max(VoteTally.frozen_at)).
+            filter(VoteTally.frozen.is_(True)).
+            group_by(VoteTally.event_id).
+            all()
+        )
+        with self._lock:
+            current = {event_id: frozen.get(event_id, False) for event_id in self._frozen}
+            current.update(frozen)
+            changed = sum(1 for event_id, frozen_at in current.items() if self._frozen.get(event_id) != frozen_at)
+            self._frozen = current
+        return changed
+
+    def invalidate(self, event_id=None):
+        """Olvida el estado congelado en memoria; se vuelve a leer en la siguiente consulta."""
+        with self._lock:
+            if event_id is None:
+                self._frozen.clear()
+            else:
+                self._frozen.pop(event_id, None)
+
+    def counts(self, event_id):
+        """{(section_id, option_id): votos} del evento, sumando los shards."""
+        rows = db.session.query(VoteTally.section_id, VoteTally.option_id, func.sum(VoteTally.votes)).\
+            filter(VoteTally.event_id == event_id).\
+            group_by(VoteTally.section_id, VoteTally.option_id).\
+            all()
+        return {(section_id, option_id): int(votes) for section_id, option_id, votes in rows}
+
+    def results(self, ballot):
+        """Resultados del evento con todas las opciones de la papeleta, O(#opciones)."""
+        counts = self.counts(ballot.event_id)
+
+        sections = []
+        for section_id, option_ids in sorted(ballot.sections.items()):
+            options = [
+                {'option_id': option_id, 'votes': counts.get((section_id, option_id), 0)}
+                for option_id in sorted(option_ids)
+            ]
+            sections.append({
+                'section_id': section_id,
+                'total_votes': sum(option['votes'] for option in options),
+                'options': options
+            })
+
+        return {'event_id': ballot.event_id, 'sections': sections}
+
+
+tally = TallyEngine()
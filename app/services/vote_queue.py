@@ -0,0 +1,168 @@
+import queue
+import threading
+import time
+from app.models import db
+
+
+class PendingVote:
+    """Voto validado a la espera de que su lote se confirme."""
+
+    __slots__ = ('event_id', 'user_id', 'section_id', 'option_id', 'location_id', 'vote_id', 'outcome', 'done')
+
+    def __init__(self, event_id, user_id, section_id, option_id, location_id=None):
+        self.event_id = event_id
+        self.user_id = user_id
+        self.section_id = section_id
+        self.option_id = option_id
+        self.location_id = location_id
+        self.vote_id = None
+        self.outcome = None  # 'created' | 'duplicate' | 'error' (o 'busy' / 'timeout' del lado del request)
+        self.done = threading.Event()
+
+
+class VoteWriter:
+    """
+    Ingesta write-behind con group commit: los requests encolan votos ya
+    validados y un hilo escritor los inserta en lotes multi-fila, con un
+    solo commit por lote. Cada request espera a que su lote se confirme,
+    así que la durabilidad no cambia. Si la espera supera VOTE_ACK_TIMEOUT
+    el voto sigue en la cola y el request responde 202 (pendiente). Una fila
+    inválida no hace fallar al resto del lote: se reintenta fila por fila.
+    - VOTE_INGESTION_MODE: 'direct' (por defecto) o 'queued'.
+    - VOTE_BATCH_SIZE: votos máximos por lote.
+    - VOTE_BATCH_MAX_WAIT: segundos máximos que espera un lote incompleto.
+    - VOTE_QUEUE_SIZE / VOTE_ACK_TIMEOUT: capacidad de la cola y espera máxima.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        self._queue = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.setdefault('VOTE_INGESTION_MODE', 'direct') == 'queued'
+        self.batch_size = app.config.setdefault('VOTE_BATCH_SIZE', 200)
+        self.max_wait = app.config.setdefault('VOTE_BATCH_MAX_WAIT', 0.01)
+        self.ack_timeout = app.config.setdefault('VOTE_ACK_TIMEOUT', 5)
+        self._queue = queue.Queue(maxsize=app.config.setdefault('VOTE_QUEUE_SIZE', 10000))
+        app.extensions['vote_writer'] = self
+
+    def submit(self, event_id, user_id, section_id, option_id, location_id=None):
+        """
+        Encola el voto y bloquea hasta que su lote se confirme.
+        Devuelve el PendingVote con `outcome` y, si se creó, `vote_id`.
+        """
+        self._ensure_started()
+
+        pending = PendingVote(event_id, user_id, section_id, option_id, location_id)
+        try:
+            self._queue.put_nowait(pending)
+        except queue.Full:
+            pending.outcome = 'busy'
+            return pending
+
+        if not pending.done.wait(self.ack_timeout):
+            pending.outcome = 'timeout'
+
+        return pending
+
+    def stop(self):
+        """Detiene el hilo escritor después de vaciar la cola."""
+        with self._lock:
+            if self._thread is not None:
+                self._queue.put(None)
+                self._thread.join()
+                self._thread = None
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='vote-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        with self.app.app_context():
+            while True:
+                first = self._queue.get()
+                if first is None:
+                    return
+
+                batch = [first]
+                deadline = time.monotonic() + self.max_wait
+                stop = False
+                while len(batch) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        pending = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if pending is None:
+                        stop = True
+                        break
+                    batch.append(pending)
+
+                self._flush(batch)
+                if stop:
+                    return
+
+    def _flush(self, batch):
+        from app.services.voting import insert_votes_isolated
+        from app.services.tally import tally
+        from app.services import rollups
+
+        created = []
+        try:
+            inserted, failed = insert_votes_isolated([
+                {
+                    'user_id': p.user_id,
+                    'section_id': p.section_id,
+                    'option_id': p.option_id,
+                    'voting_location_id': p.location_id
+                }
+                for p in batch
+            ])
+            for pending in batch:
+                # Si falta, ya existía, lo insertó otro voto del mismo lote o la fila es inválida
+                pending.vote_id = inserted.pop((pending.user_id, pending.section_id), None)
+                if pending.vote_id is not None:
+                    created.append(pending)
+                elif (pending.user_id, pending.section_id) in failed:
+                    pending.outcome = 'error'
+
+            votes = [(p.event_id, p.section_id, p.option_id, p.user_id) for p in created]
+            tally.record_votes(votes)
+            rollups.record_votes(votes)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            self.app.logger.exception('Vote batch of %d failed', len(batch))
+            for pending in batch:
+                pending.vote_id = None
+                pending.outcome = 'error'
+                pending.done.set()
+            return
+        finally:
+            db.session.remove()
+
+        for pending in batch:
+            if pending.outcome == 'error':
+                pass
+            elif pending.vote_id is None:
+                pending.outcome = 'duplicate'
+            else:
+                pending.outcome = 'created'
+                tally.record(pending.event_id, pending.section_id, pending.option_id)
+            pending.done.set()
+
+
+vote_writer = VoteWriter()
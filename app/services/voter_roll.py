@@ -0,0 +1,211 @@
+from datetime import datetime, date
+from flask import current_app
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from itertools import islice
+import csv
+import io
+import time
+from app.models import db, User, Role
+from app.utils.hashing import password_hasher, UNUSABLE_PASSWORD
+
+FIELDS = [
+    'document_number', 'document_type', 'first_name', 'last_name', 'birth_date', 'gender',
+    'country', 'region', 'province', 'district', 'email'
+]
+
+# Columnas que escribe la carga; COPY no aplica los defaults de los modelos
+COLUMNS = FIELDS + ['password', 'role_id', 'status', 'failed_login_attempts', 'created_at']
+
+LIMITS = {column.name: column.type.length for column in User.__table__.columns
+          if column.name in FIELDS and getattr(column.type, 'length', None)}
+
+
+class ImportReport:
+    """Contadores de una importación; `on_progress` lo recibe después de cada lote."""
+
+    def __init__(self, max_errors=1000):
+        self.max_errors = max_errors
+        self.started = time.perf_counter()
+        self.read = 0
+        self.created = 0
+        self.without_password = 0
+        self.skipped = 0
+        self.invalid = 0
+        self.failed = 0
+        self.batches = 0
+        self.errors = []
+
+    def error(self, row, message):
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'row': row, 'error': message})
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def to_dict(self):
+        elapsed = self.elapsed
+        return {
+            'read': self.read,
+            'created': self.created,
+            'without_password': self.without_password,
+            'skipped': self.skipped,
+            'invalid': self.invalid,
+            'failed': self.failed,
+            'batches': self.batches,
+            'elapsed_seconds': round(elapsed, 3),
+            'rows_per_second': round(self.read / elapsed, 1) if elapsed else 0.0,
+            'errors': self.errors
+        }
+
+
+def _existing_keys():
+    """Emails y documentos ya registrados, leídos en streaming."""
+    emails, documents = set(), set()
+    result = db.session.execute(
+        db.select(User.email, User.document_number).execution_options(yield_per=10000)
+    )
+    for email, document_number in result:
+        emails.add(email.lower())
+        if document_number:
+            documents.add(document_number)
+    return emails, documents
+
+
+def _clean(row):
+    """Normaliza una fila del padrón. Devuelve (mapping, error)."""
+    if not isinstance(row, dict):
+        return None, 'Row must be an object'
+
+    mapping = {field: (str(row[field]).strip() or None) if row.get(field) is not None else None
+               for field in FIELDS}
+
+    if not mapping['email'] or '@' not in mapping['email']:
+        return None, 'Invalid or missing email'
+    mapping['email'] = mapping['email'].lower()
+
+    for field, length in LIMITS.items():
+        if mapping[field] and len(mapping[field]) > length:
+            return None, f'{field} is longer than {length} characters'
+
+    if mapping['birth_date']:
+        try:
+            mapping['birth_date'] = date.fromisoformat(mapping['birth_date'])
+        except ValueError:
+            return None, 'Invalid birth_date. Use YYYY-MM-DD'
+
+    mapping['country'] = mapping['country'] or 'Peru'
+    return mapping, None
+
+
+def import_voter_roll(rows, batch_size=None, on_progress=None, processes=False):
+    """
+    Importa votantes (rol 'voter') desde un iterable de dicts con los campos
+    de FIELDS y, opcionalmente, 'password'. Sin contraseña la cuenta queda
+    con UNUSABLE_PASSWORD hasta que el votante la defina con un token de
+    `flask voters password-tokens` o POST /auth/password/token.
+    - Los duplicados (email o document_number) se detectan contra un set
+      en memoria con lo ya registrado y lo leído del propio archivo, y se
+      omiten (reimportar el mismo padrón no es un error).
+    - Las contraseñas de cada lote se hashean con password_hasher;
+      `processes=True` usa el pool de procesos (solo desde la CLI, no
+      dentro de un request).
+    - Cada lote se carga con COPY en PostgreSQL (psycopg2) o con un INSERT
+      multi-fila en otros motores, y se confirma por separado.
+    Devuelve el ImportReport.
+    """
+    batch_size = batch_size or current_app.config.get('VOTER_IMPORT_BATCH_SIZE', 5000)
+    report = ImportReport(current_app.config.get('VOTER_IMPORT_MAX_ERRORS', 1000))
+
+    role = Role.query.filter_by(name='voter').first()
+    if role is None:
+        raise ValueError('Role "voter" does not exist; run /admin/seed first')
+
+    emails, documents = _existing_keys()
+    numbered = enumerate(rows, start=1)
+
+    while True:
+        chunk = list(islice(numbered, batch_size))
+        if not chunk:
+            break
+
+        numbers, mappings, passwords = [], [], []
+        for number, row in chunk:
+            report.read += 1
+            mapping, error = _clean(row)
+            if error:
+                report.invalid += 1
+                report.error(number, error)
+                continue
+
+            document_number = mapping['document_number']
+            if mapping['email'] in emails or (document_number and document_number in documents):
+                report.skipped += 1
+                continue
+
+            emails.add(mapping['email'])
+            if document_number:
+                documents.add(document_number)
+
+            numbers.append(number)
+            mappings.append(mapping)
+            passwords.append(str(row['password']) if row.get('password') else None)
+
+        if mappings:
+            now = datetime.utcnow()
+            given = [password for password in passwords if password is not None]
+            hashes = iter(password_hasher.hash_many(given, processes=processes))
+            for mapping, password in zip(mappings, passwords):
+                if password is None:
+                    report.without_password += 1
+                mapping.update(password=next(hashes) if password is not None else UNUSABLE_PASSWORD,
+                               role_id=role.id, status='active', failed_login_attempts=0, created_at=now)
+            try:
+                _load(mappings)
+                db.session.commit()
+                report.created += len(mappings)
+            except SQLAlchemyError as e:
+                db.session.rollback()
+                message = str(getattr(e, 'orig', e)).splitlines()[0]
+                report.failed += len(mappings)
+                for number in numbers:
+                    report.error(number, f'Database error: {message}')
+
+        report.batches += 1
+        if on_progress is not None:
+            on_progress(report)
+
+    return report
+
+
+def _load(mappings):
+    if db.session.get_bind().dialect.name == 'postgresql':
+        cursor = db.session.connection().connection.cursor()
+        if hasattr(cursor, 'copy_expert'):
+            try:
+                _copy(cursor, mappings)
+            except Exception as e:
+                # Para que el llamador haga rollback como con cualquier error de la base
+                raise SQLAlchemyError(str(e)) from e
+            finally:
+                cursor.close()
+            return
+        cursor.close()
+
+    db.session.execute(insert(User), mappings)
+
+
+def _copy(cursor, mappings):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for mapping in mappings:
+        writer.writerow([
+            r'\N' if mapping[column] is None else mapping[column]
+            for column in COLUMNS
+        ])
+    buffer.seek(0)
+    cursor.copy_expert(
+        f"COPY {User.__tablename__} ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+        buffer
+    )
@@ -0,0 +1,394 @@
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from app.models import db, User, Vote
+from app.services.ballot_cache import ballot_cache
+from app.services.tally import tally
+from app.services import rollups
+from app.services.vote_queue import vote_writer
+from app.utils.security import location_keys
+
+
+# Único constraint que significa "ya votó en esta sección"
+DUPLICATE_VOTE_CONSTRAINT = 'unique_vote_per_user_per_section'
+
+
+class VoteError(Exception):
+    """Error de negocio al emitir un voto. Lleva el código HTTP a devolver."""
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def _as_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_duplicate_vote(error):
+    """True si el IntegrityError viene de unique_vote_per_user_per_section (y no de una FK, NOT NULL u otro UNIQUE)."""
+    orig = getattr(error, 'orig', error)
+    constraint = getattr(getattr(orig, 'diag', None), 'constraint_name', None)
+    if constraint is not None:
+        return constraint == DUPLICATE_VOTE_CONSTRAINT
+    # SQLite no informa el nombre del constraint, solo sus columnas
+    message = str(orig)
+    return DUPLICATE_VOTE_CONSTRAINT in message or \
+        'UNIQUE constraint failed: vt_votes.user_id, vt_votes.section_id' in message
+
+
+def upload_lag():
+    """Tiempo tras el cierre de un evento en el que se aceptan lotes de kioskos (VOTE_BATCH_MAX_UPLOAD_LAG)."""
+    return timedelta(seconds=current_app.config.get('VOTE_BATCH_MAX_UPLOAD_LAG', 3600))
+
+
+def upload_deadline(end_datetime):
+    """Hasta cuándo se aceptan lotes de kioskos de un evento que cierra en `end_datetime`."""
+    return end_datetime + upload_lag()
+
+
+def validate_ballot(event_id, section_id, option_id, now=None, received_at=None):
+    """
+    Valida la ventana del evento y la relación evento → sección → opción
+    contra la papeleta en cache. Devuelve (event_id, section_id, option_id)
+    normalizados.
+    - now: hora del voto (por defecto, la del servidor).
+    - received_at: hora de llegada de un voto diferido (lotes de kioskos);
+      se rechaza si pasó upload_deadline() o el conteo ya está congelado.
+    """
+    event_id = _as_id(event_id)
+    ballot = ballot_cache.get(event_id)
+    if ballot is None:
+        raise VoteError('Event not found', 404)
+
+    now = now or datetime.utcnow()
+    if not (ballot.start_datetime <= now <= ballot.end_datetime):
+        raise VoteError('Voting is closed for this event', 403)
+
+    if received_at is not None and (
+        received_at > upload_deadline(ballot.end_datetime) or tally.is_frozen(event_id)
+    ):
+        raise VoteError('Upload window for this event has closed', 403)
+
+    section_id = _as_id(section_id)
+    options = ballot.sections.get(section_id)
+    if options is None:
+        raise VoteError('Section not found in this event', 404)
+
+    option_id = _as_id(option_id)
+    if option_id not in options:
+        raise VoteError('Option not found in this section', 404)
+
+    return event_id, section_id, option_id
+
+
+def check_kiosk_voter(user_id, location_id):
+    """
+    Valida al votante de un kiosko: debe existir, estar activo y estar
+    empadronado en el distrito (misma región y provincia) del local.
+    Devuelve el user_id normalizado.
+    """
+    user_id = _as_id(user_id)
+    voter = db.session.query(User.status, User.region, User.province, User.district).\
+        filter(User.id == user_id).first() if user_id is not None else None
+    if voter is None:
+        raise VoteError('User not found', 404)
+    if voter.status != 'active':
+        raise VoteError('User is not active', 403)
+    if (voter.region, voter.province, voter.district) != location_keys.area(location_id):
+        raise VoteError('Voter is not registered in this district', 403)
+    return user_id
+
+
+def insert_votes(rows):
+    """
+    Inserta varios votos en una sola sentencia, ignorando solo los que violan
+    unique_vote_per_user_per_section. No hace commit.
+    Cualquier otra restricción (FK, idempotency_key repetida) hace fallar toda
+    la sentencia con IntegrityError; insert_votes_isolated() la aísla.
+    Devuelve {(user_id, section_id): vote_id} de las filas insertadas.
+    """
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        inserted, failed = _insert_votes_one_by_one(rows)
+        if failed:
+            raise next(iter(failed.values()))
+        return inserted
+
+    statement = insert(Vote).on_conflict_do_nothing(index_elements=['user_id', 'section_id']).\
+        returning(Vote.id, Vote.user_id, Vote.section_id)
+    result = db.session.execute(statement, rows)
+
+    return {(user_id, section_id): vote_id for vote_id, user_id, section_id in result}
+
+
+def insert_votes_isolated(rows):
+    """
+    insert_votes() dentro de un SAVEPOINT; si el lote falla por una fila
+    inválida, reintenta fila por fila para que esa fila no arrastre a las
+    demás. No hace commit.
+    Devuelve (insertados, fallidos): fallidos es {(user_id, section_id): IntegrityError}
+    de las filas rechazadas por algo distinto al voto duplicado.
+    """
+    try:
+        with db.session.begin_nested():
+            return insert_votes(rows), {}
+    except IntegrityError:
+        return _insert_votes_one_by_one(rows)
+
+
+def _insert_votes_one_by_one(rows):
+    # Un SAVEPOINT por fila: el voto duplicado se ignora, el resto se informa
+    inserted, failed = {}, {}
+    for row in rows:
+        try:
+            with db.session.begin_nested():
+                vote = Vote(**row)
+                db.session.add(vote)
+            inserted[(vote.user_id, vote.section_id)] = vote.id
+        except IntegrityError as e:
+            if not is_duplicate_vote(e):
+                failed[(row['user_id'], row['section_id'])] = e
+    return inserted, failed
+
+
+def cast_vote(user_id, event_id, section_id, option_id, location_id=None):
+    """
+    Valida la papeleta (sin consultas si está en cache) e inserta el voto.
+    El voto duplicado lo detecta el constraint unique_vote_per_user_per_section.
+    Con VOTE_INGESTION_MODE='queued' el INSERT se agrupa con otros votos
+    (ver vote_queue.VoteWriter). `location_id` es el local del kiosko, si aplica.
+    Devuelve el id del voto, o None si el voto quedó encolado pero su lote
+    no se confirmó dentro de VOTE_ACK_TIMEOUT (sigue pendiente: no reintentar).
+    """
+    event_id, section_id, option_id = validate_ballot(event_id, section_id, option_id)
+
+    if vote_writer.enabled:
+        return _cast_queued(user_id, event_id, section_id, option_id, location_id)
+
+    vote = Vote(
+        user_id=user_id,
+        option_id=option_id,
+        section_id=section_id,
+        voting_location_id=location_id
+    )
+    db.session.add(vote)
+
+    try:
+        db.session.flush()
+        vote_id = vote.id
+        tally.record_votes([(event_id, section_id, option_id, user_id)])
+        rollups.record_votes([(event_id, section_id, option_id, user_id)])
+        db.session.commit()
+    except IntegrityError as e:
+        db.session.rollback()
+        if not is_duplicate_vote(e):
+            raise
+        raise VoteError('You have already voted in this section', 409)
+
+    tally.record(event_id, section_id, option_id)
+
+    return vote_id
+
+
+def _cast_queued(user_id, event_id, section_id, option_id, location_id):
+    pending = vote_writer.submit(event_id, user_id, section_id, option_id, location_id)
+
+    if pending.outcome == 'created':
+        return pending.vote_id
+    if pending.outcome == 'duplicate':
+        raise VoteError('You have already voted in this section', 409)
+    if pending.outcome == 'timeout':
+        # Ya está en la cola: puede confirmarse después, así que no es un error reintentable
+        return None
+    if pending.outcome == 'busy':
+        raise VoteError('Vote queue is busy, please retry', 503)
+    raise VoteError('Vote could not be stored', 500)
+
+
+# Lotes de kioskos sin conexión
+
+BATCH_FIELDS = ['user_id', 'event_id', 'section_id', 'option_id', 'client_timestamp', 'idempotency_key']
+
+
+def _parse_batch_record(record, latest):
+    if not isinstance(record, dict) or not all(record.get(field) is not None for field in BATCH_FIELDS):
+        raise VoteError('Missing voting data', 400)
+
+    key = str(record['idempotency_key']).strip()
+    if not key or len(key) > 64:
+        raise VoteError('Invalid idempotency key', 400)
+
+    user_id = _as_id(record['user_id'])
+    if user_id is None:
+        raise VoteError('Invalid user_id', 400)
+
+    try:
+        client_timestamp = datetime.fromisoformat(str(record['client_timestamp']))
+    except ValueError:
+        raise VoteError('Invalid client_timestamp. Use ISO 8601', 400)
+    if client_timestamp.tzinfo is not None:
+        client_timestamp = client_timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    if client_timestamp > latest:
+        raise VoteError('client_timestamp is in the future', 400)
+
+    return key, user_id, client_timestamp
+
+
+def _batch_result(index, key, outcome, status, vote_id=None, error=None):
+    result = {'index': index, 'idempotency_key': key, 'outcome': outcome, 'status': status}
+    if vote_id is not None:
+        result['vote_id'] = vote_id
+    if error is not None:
+        result['error'] = error
+    return result
+
+
+def cast_votes_batch(records, location_id=None):
+    """
+    Registra un lote de votos subido por un kiosko que estuvo sin conexión.
+    - records: dicts con user_id, event_id, section_id, option_id,
+      client_timestamp (ISO 8601, hora del kiosko) e idempotency_key.
+    La ventana del evento se valida con client_timestamp (con hasta
+    VOTE_BATCH_MAX_CLOCK_SKEW segundos de adelanto respecto al servidor), y
+    el lote debe llegar antes de VOTE_BATCH_MAX_UPLOAD_LAG segundos después
+    del cierre, cuando el scheduler congela el conteo final.
+    Se valida todo el lote en memoria contra la papeleta en cache, con una
+    consulta para las claves ya usadas y otra para el estado de los votantes,
+    y los votos válidos se insertan en un solo INSERT multi-fila.
+    Reenviar un lote es idempotente: los registros ya guardados vuelven como
+    'replayed' con su vote_id original.
+    Devuelve un resultado por registro, en el mismo orden.
+    """
+    received_at = datetime.utcnow()
+    latest = received_at + timedelta(seconds=current_app.config.get('VOTE_BATCH_MAX_CLOCK_SKEW', 300))
+    results = [None] * len(records)
+    parsed = {}    # idempotency_key -> (index, user_id, client_timestamp, record)
+    repeated = []  # (index, idempotency_key, user_id) con clave repetida dentro del lote
+
+    for index, record in enumerate(records):
+        try:
+            key, user_id, client_timestamp = _parse_batch_record(record, latest)
+        except VoteError as e:
+            key = record.get('idempotency_key') if isinstance(record, dict) else None
+            results[index] = _batch_result(index, key, 'rejected', e.status_code, error=e.message)
+            continue
+
+        if key in parsed:
+            repeated.append((index, key, user_id))
+        else:
+            parsed[key] = (index, user_id, client_timestamp, record)
+
+    # Reintentos: claves que ya tienen un voto guardado
+    stored = _stored_keys(list(parsed))
+
+    pending = {}
+    for key, (index, user_id, client_timestamp, record) in parsed.items():
+        if key in stored:
+            results[index] = _replay_result(index, key, user_id, record, stored[key])
+            continue
+        try:
+            pending[key] = (index, user_id) + validate_ballot(
+                record['event_id'], record['section_id'], record['option_id'],
+                now=client_timestamp, received_at=received_at
+            ) + (client_timestamp,)
+        except VoteError as e:
+            results[index] = _batch_result(index, key, 'rejected', e.status_code, error=e.message)
+
+    voters = {
+        row.id: row for row in
+        db.session.query(User.id, User.status, User.region, User.province, User.district).
+        filter(User.id.in_({entry[1] for entry in pending.values()}))
+    } if pending else {}
+    area = location_keys.area(location_id) if location_id is not None else None
+
+    rows = []
+    for key, (index, user_id, event_id, section_id, option_id, client_timestamp) in list(pending.items()):
+        voter = voters.get(user_id)
+        if voter is None or voter.status != 'active':
+            results[index] = _batch_result(index, key, 'rejected', 403, error='User is not active')
+            del pending[key]
+            continue
+        if location_id is not None and (voter.region, voter.province, voter.district) != area:
+            results[index] = _batch_result(index, key, 'rejected', 403, error='Voter is not registered in this district')
+            del pending[key]
+            continue
+        rows.append({
+            'user_id': user_id,
+            'section_id': section_id,
+            'option_id': option_id,
+            'voting_location_id': location_id,
+            'client_timestamp': client_timestamp,
+            'idempotency_key': key
+        })
+
+    created = []
+    if rows:
+        inserted, failed = insert_votes_isolated(rows)
+        missing = []
+        for key, (index, user_id, event_id, section_id, option_id, _) in pending.items():
+            vote_id = inserted.pop((user_id, section_id), None)
+            if vote_id is None:
+                missing.append(key)
+            else:
+                created.append((event_id, section_id, option_id, user_id, vote_id))
+                results[index] = _batch_result(index, key, 'created', 201, vote_id=vote_id)
+
+        tally.record_votes(vote[:4] for vote in created)
+        rollups.record_votes(vote[:4] for vote in created)
+        db.session.commit()
+
+        # Sin insertar: otro envío del mismo lote ganó la carrera, el votante ya
+        # había votado o la fila violó otra restricción
+        stored = _stored_keys(missing) if missing else {}
+        for key in missing:
+            index, user_id, event_id, section_id = pending[key][:4]
+            if key in stored:
+                results[index] = _replay_result(index, key, user_id, parsed[key][3], stored[key])
+            elif (user_id, section_id) in failed:
+                results[index] = _batch_result(index, key, 'rejected', 422, error='Vote could not be stored')
+            else:
+                results[index] = _batch_result(
+                    index, key, 'rejected', 409, error='You have already voted in this section'
+                )
+
+    for event_id, section_id, option_id, user_id, vote_id in created:
+        tally.record(event_id, section_id, option_id)
+
+    for index, key, user_id in repeated:
+        first = results[parsed[key][0]]
+        if first['outcome'] == 'rejected':
+            results[index] = dict(first, index=index)
+        elif user_id == parsed[key][1]:
+            results[index] = dict(first, index=index, outcome='replayed', status=200)
+        else:
+            results[index] = _batch_result(
+                index, key, 'rejected', 409, error='Idempotency key already used for a different vote'
+            )
+
+    return results
+
+
+def _stored_keys(keys):
+    return {
+        key: (vote_id, user_id, section_id, option_id)
+        for key, vote_id, user_id, section_id, option_id in
+        db.session.query(Vote.idempotency_key, Vote.id, Vote.user_id, Vote.section_id, Vote.option_id).
+        filter(Vote.idempotency_key.in_(keys))
+    } if keys else {}
+
+
+def _replay_result(index, key, user_id, record, stored):
+    vote_id, stored_user_id, section_id, option_id = stored
+    if (stored_user_id, section_id, option_id) != (user_id, _as_id(record['section_id']), _as_id(record['option_id'])):
+        return _batch_result(index, key, 'rejected', 409, error='Idempotency key already used for a different vote')
+    return _batch_result(index, key, 'replayed', 200, vote_id=vote_id)
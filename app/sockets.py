@@ -0,0 +1,179 @@
+import logging
+import os
+import queue
+import threading
+from flask import request
+from flask_socketio import SocketIO, Namespace, join_room, leave_room, emit
+from socketio import PubSubManager
+from app.services.ballot_cache import ballot_cache
+from app.services.tally import tally
+
+logger = logging.getLogger(__name__)
+
+RESULTS_NAMESPACE = '/results'
+
+socketio = SocketIO()
+
+
+def event_room(event_id):
+    return f'event:{event_id}'
+
+
+class LocalPubSubManager(PubSubManager):
+    """
+    Broker en memoria del proceso (SOCKETIO_MESSAGE_QUEUE='local://'):
+    reparte cada mensaje a todos los managers suscritos al mismo canal.
+    Sirve para pruebas con varios servidores Socket.IO en un solo proceso;
+    entre procesos hace falta un broker real (redis://, amqp://...).
+    """
+
+    name = 'local'
+
+    _subscribers = {}  # canal -> [queue.Queue, ...]
+    _subscribers_lock = threading.Lock()
+
+    def __init__(self, channel='socketio', write_only=False, logger=None, json=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger, json=json)
+        self._inbox = queue.Queue()
+        if not write_only:
+            with self._subscribers_lock:
+                self._subscribers.setdefault(channel, []).append(self._inbox)
+
+    def _publish(self, data):
+        message = self.json.dumps(data)
+        with self._subscribers_lock:
+            inboxes = list(self._subscribers.get(self.channel, ()))
+        for inbox in inboxes:
+            inbox.put(message)
+
+    def _listen(self):
+        while True:
+            yield self._inbox.get()
+
+
+class TallyBroadcaster:
+    """
+    Junta las opciones que recibieron votos y cada `interval` segundos emite
+    su total actual leído de vt_vote_tallies: un mensaje por evento y tick,
+    no uno por voto. Se envían totales y no deltas porque los totales solo
+    crecen: el cliente se queda con el mayor, así un voto que ya venía en el
+    snapshot de 'results' (o en el update de otro worker) no se suma dos veces.
+    """
+
+    def __init__(self, socketio, namespace, interval=0.5):
+        self.socketio = socketio
+        self.namespace = namespace
+        self.interval = interval
+        self.app = None
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._task = None
+
+    def push(self, event_id, section_id, option_id, delta):
+        with self._lock:
+            self._pending.setdefault(event_id, set()).add((section_id, option_id))
+
+    def start(self):
+        """Arranca el ciclo de envío (una sola vez por proceso)."""
+        with self._lock:
+            if self._task is None:
+                self._task = self.socketio.start_background_task(self._run)
+
+    def flush(self):
+        """Emite los totales de las opciones pendientes; devuelve cuántos mensajes se enviaron."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        with self.app.app_context():
+            for event_id, changed in pending.items():
+                counts = tally.counts(event_id)
+                self.socketio.emit('tally_update', {
+                    'event_id': event_id,
+                    'options': [
+                        {'section_id': section_id, 'option_id': option_id, 'votes': counts.get((section_id, option_id), 0)}
+                        for section_id, option_id in sorted(changed)
+                    ]
+                }, to=event_room(event_id), namespace=self.namespace)
+
+        return len(pending)
+
+    def _run(self):
+        while True:
+            self.socketio.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Tally broadcast failed')
+
+
+broadcaster = TallyBroadcaster(socketio, RESULTS_NAMESPACE)
+
+
+class ResultsNamespace(Namespace):
+    """
+    Los dashboards se conectan con auth={'api_key': ADMIN_API_KEY}, emiten
+    'subscribe' con {'event_id': ...} y reciben un 'results' inicial seguido
+    de 'tally_update' periódicos con el total de cada opción que cambió. Un
+    update cuyo total no supera al que el cliente ya tiene para esa opción
+    (llegó tarde o ya estaba en el snapshot) se descarta.
+    """
+
+    def on_connect(self, auth=None):
+        api_key = (auth or {}).get('api_key') or request.headers.get('x-api-key')
+        if not api_key or api_key != os.getenv('ADMIN_API_KEY'):
+            return False
+
+        broadcaster.start()
+
+    def on_subscribe(self, data):
+        try:
+            event_id = int((data or {}).get('event_id'))
+        except (TypeError, ValueError):
+            event_id = None
+
+        ballot = ballot_cache.get(event_id)
+        if ballot is None:
+            emit('error', {'error': 'Event not found'})
+            return
+
+        join_room(event_room(event_id))
+        emit('results', tally.results(ballot))
+
+    def on_unsubscribe(self, data):
+        leave_room(event_room((data or {}).get('event_id')))
+
+
+def init_socketio(app):
+    """
+    - SOCKETIO_ASYNC_MODE: 'eventlet', 'threading'... (None = autodetectar).
+    - SOCKETIO_BROADCAST_INTERVAL: segundos entre envíos de totales.
+    - SOCKETIO_MESSAGE_QUEUE: broker compartido por los workers (redis://,
+      amqp://, kafka://... o 'local://' para pruebas), para que los emits
+      lleguen a los clientes conectados a cualquier worker.
+    - SOCKETIO_CHANNEL: canal del broker.
+    """
+    options = {
+        'async_mode': app.config.setdefault('SOCKETIO_ASYNC_MODE', None),
+        'cors_allowed_origins': app.config.setdefault('SOCKETIO_CORS_ORIGINS', '*')
+    }
+
+    message_queue = app.config.setdefault('SOCKETIO_MESSAGE_QUEUE', None)
+    channel = app.config.setdefault('SOCKETIO_CHANNEL', 'votario')
+    if message_queue == 'local://':
+        options['client_manager'] = LocalPubSubManager(channel=channel)
+    elif message_queue:
+        options.update(message_queue=message_queue, channel=channel)
+
+    socketio.init_app(app, **options)
+    socketio.on_namespace(ResultsNamespace(RESULTS_NAMESPACE))
+
+    broadcaster.app = app
+    broadcaster.interval = app.config.setdefault('SOCKETIO_BROADCAST_INTERVAL', 0.5)
+    tally.add_listener(broadcaster.push)
+
+    # Con varios workers, los votos de un worker sin dashboards conectados
+    # también tienen que publicarse en el broker
+    if message_queue:
+        broadcaster.start()
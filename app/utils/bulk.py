@@ -0,0 +1,153 @@
+from flask import request, current_app
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from itertools import islice
+import csv
+import io
+from app.models import db
+
+
+class BulkInputError(Exception):
+    pass
+
+
+def iter_rows():
+    """
+    Filas del request: un CSV subido en el campo 'file' (se lee en streaming)
+    o un arreglo JSON en el cuerpo. Las celdas vacías del CSV se omiten.
+    """
+    upload = request.files.get('file')
+    if upload is not None:
+        stream = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')
+        for row in csv.DictReader(stream):
+            yield {key: value for key, value in row.items() if key and value not in (None, '')}
+        return
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, list):
+        raise BulkInputError('Expected a JSON array or a CSV file upload')
+    yield from data
+
+
+def _chunks(rows, size):
+    numbered = enumerate(rows, start=1)
+    while True:
+        chunk = list(islice(numbered, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def bulk_insert(model, rows, validate, build, parent=None, returning=()):
+    """
+    Valida e inserta filas por lotes (BULK_IMPORT_CHUNK_SIZE), con un INSERT
+    multi-fila y un commit por lote. Si la base rechaza el lote, se reintenta
+    fila por fila (un SAVEPOINT cada una) y solo se informan las que fallan.
+    - validate(row) -> mensaje de error o None (las mismas reglas que create).
+    - build(row) -> dict de columnas para el INSERT.
+    - parent: (campo, Modelo, mensaje) para verificar que la FK exista y no
+      esté borrada (como en create).
+    - returning: columnas extra a devolver por cada fila creada.
+    Devuelve (created, errors), ambos listas de dicts con el número de fila.
+    """
+    chunk_size = current_app.config.get('BULK_IMPORT_CHUNK_SIZE', 500)
+    created, errors = [], []
+
+    for chunk in _chunks(rows, chunk_size):
+        numbers, mappings = [], []
+
+        for number, row in chunk:
+            error = validate(row) if isinstance(row, dict) else 'Row must be an object'
+            if error:
+                errors.append({'row': number, 'error': error})
+                continue
+            numbers.append(number)
+            mappings.append(build(row))
+
+        if parent is not None and mappings:
+            numbers, mappings = _check_parents(parent, numbers, mappings, errors)
+
+        if not mappings:
+            continue
+
+        columns = [getattr(model, name) for name in returning]
+        statement = insert(model).returning(model.id, *columns, sort_by_parameter_order=True)
+
+        try:
+            result = db.session.execute(statement, mappings).all()
+            db.session.commit()
+        except SQLAlchemyError:
+            db.session.rollback()
+            numbers, result = _insert_one_by_one(statement, numbers, mappings, errors)
+
+        for number, inserted in zip(numbers, result):
+            entry = {'row': number, 'id': inserted[0]}
+            entry.update(zip(returning, inserted[1:]))
+            created.append(entry)
+
+    return created, errors
+
+
+def _database_error(error):
+    message = str(getattr(error, 'orig', error)).splitlines()[0]
+    return f'Database error: {message}'
+
+
+def _insert_one_by_one(statement, numbers, mappings, errors):
+    inserted_numbers, inserted = [], []
+    for number, mapping in zip(numbers, mappings):
+        try:
+            with db.session.begin_nested():
+                row = db.session.execute(statement, [mapping]).one()
+        except SQLAlchemyError as e:
+            errors.append({'row': number, 'error': _database_error(e)})
+            continue
+        inserted_numbers.append(number)
+        inserted.append(row)
+
+    try:
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        errors.extend({'row': number, 'error': _database_error(e)} for number in inserted_numbers)
+        return [], []
+    return inserted_numbers, inserted
+
+
+def _check_parents(parent, numbers, mappings, errors):
+    field, parent_model, message = parent
+
+    for mapping in mappings:
+        try:
+            mapping[field] = int(mapping[field])
+        except (TypeError, ValueError):
+            mapping[field] = None
+
+    ids = {mapping[field] for mapping in mappings if mapping[field] is not None}
+    existing = {
+        row[0] for row in
+        db.session.query(parent_model.id).
+        filter(parent_model.id.in_(ids), parent_model.status != 'deleted').
+        all()
+    } if ids else set()
+
+    valid_numbers, valid_mappings = [], []
+    for number, mapping in zip(numbers, mappings):
+        if mapping[field] in existing:
+            valid_numbers.append(number)
+            valid_mappings.append(mapping)
+        else:
+            errors.append({'row': number, 'error': message})
+
+    return valid_numbers, valid_mappings
+
+
+def bulk_response(created, errors):
+    """201 si todo se creó, 207 si fue parcial, 400 si no se creó nada."""
+    status = 201 if not errors else (207 if created else 400)
+    return {
+        'created': len(created),
+        'failed': len(errors),
+        'rows': created,
+        'errors': sorted(errors, key=lambda error: error['row'])
+    }, status
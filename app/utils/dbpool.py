@@ -0,0 +1,133 @@
+import logging
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool, NullPool
+
+logger = logging.getLogger(__name__)
+
+
+class PoolMetrics:
+    """Contadores de checkout y tiempo de espera del pool de conexiones."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.checkins = 0
+            self.connects = 0
+            self.timeouts = 0
+            self.wait_seconds_total = 0.0
+            self.wait_seconds_max = 0.0
+
+    def observe_wait(self, seconds, timed_out=False):
+        with self._lock:
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def incr(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'checkins': self.checkins,
+                'in_use': self.checkouts - self.checkins,
+                'connects': self.connects,
+                'timeouts': self.timeouts,
+                'wait_seconds_total': round(self.wait_seconds_total, 6),
+                'wait_seconds_max': round(self.wait_seconds_max, 6),
+                'wait_seconds_avg': round(self.wait_seconds_total / self.checkouts, 6) if self.checkouts else 0.0
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool que mide cuánto espera cada checkout por una conexión libre."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.observe_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_metrics.observe_wait(time.perf_counter() - start)
+        return connection
+
+
+def engine_options(config):
+    """
+    Construye SQLALCHEMY_ENGINE_OPTIONS a partir de las claves DB_* de la config.
+    SQLite conserva el pool por defecto de SQLAlchemy.
+    """
+    uri = config.get('SQLALCHEMY_DATABASE_URI') or ''
+    if uri.startswith('sqlite'):
+        return {}
+
+    mode = config.get('DB_POOL_MODE', 'queue')
+    options = {'pool_pre_ping': config.get('DB_POOL_PRE_PING', True)}
+
+    if mode == 'null':
+        options['poolclass'] = NullPool
+    elif mode in ('queue', 'eventlet'):
+        options.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=config.get('DB_POOL_SIZE', 10),
+            max_overflow=config.get('DB_MAX_OVERFLOW', 20),
+            pool_timeout=config.get('DB_POOL_TIMEOUT', 10),
+            pool_recycle=config.get('DB_POOL_RECYCLE', 1800),
+            pool_use_lifo=True
+        )
+        if mode == 'eventlet':
+            _patch_psycopg_for_eventlet()
+    else:
+        raise ValueError(f'Unknown DB_POOL_MODE: {mode}')
+
+    timeout = config.get('DB_STATEMENT_TIMEOUT_MS', 0)
+    if timeout and uri.startswith('postgresql'):
+        options['connect_args'] = {'options': f'-c statement_timeout={int(timeout)}'}
+
+    return options
+
+
+def _patch_psycopg_for_eventlet():
+    # Sin psycogreen, psycopg2 bloquea el hub de eventlet mientras espera a la base
+    try:
+        from psycogreen.eventlet import patch_psycopg
+    except ImportError:
+        logger.warning('DB_POOL_MODE=eventlet without psycogreen installed: queries will block the hub')
+        return
+    patch_psycopg()
+
+
+def _on_checkout(*args):
+    pool_metrics.incr('checkouts')
+
+
+def _on_checkin(*args):
+    pool_metrics.incr('checkins')
+
+
+def _on_connect(*args):
+    pool_metrics.incr('connects')
+
+
+def register_pool_metrics(engine):
+    """Conecta los contadores de checkout/checkin del engine a pool_metrics."""
+    if event.contains(engine, 'checkout', _on_checkout):
+        return
+
+    event.listen(engine, 'checkout', _on_checkout)
+    event.listen(engine, 'checkin', _on_checkin)
+    event.listen(engine, 'connect', _on_connect)
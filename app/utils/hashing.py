@@ -0,0 +1,155 @@
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+import os
+import threading
+import time
+
+# Valor de vt_users.password de las cuentas sin contraseña definida (p. ej.
+# votantes importados del padrón): no es un hash válido, así que nunca coincide
+UNUSABLE_PASSWORD = '!'
+
+
+def _eventlet_patched():
+    try:
+        from eventlet import patcher
+    except ImportError:
+        return False
+    return patcher.is_monkey_patched('thread')
+
+
+class PasswordHasher:
+    """
+    Ejecuta generate_password_hash / check_password_hash fuera del hilo del
+    request, con un máximo de PASSWORD_HASH_WORKERS hashes simultáneos.
+    - PASSWORD_HASH_MODE:
+        'auto'     (por defecto): 'eventlet' si eventlet parcheó threading, si no 'thread'.
+        'eventlet' hilos nativos de eventlet.tpool; el hub sigue atendiendo requests.
+        'thread'   ThreadPoolExecutor (hashlib libera el GIL mientras calcula).
+        'process'  ProcessPoolExecutor.
+        'inline'   en el mismo hilo, sin pool.
+    Los requests que esperan un hueco cuentan como cola (ver stats()).
+    """
+
+    modes = ('auto', 'eventlet', 'thread', 'process', 'inline')
+
+    def __init__(self, app=None):
+        self.mode = 'inline'
+        self.workers = os.cpu_count() or 2
+        self._slots = threading.BoundedSemaphore(self.workers)
+        self._executors = {}
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.max_queued = 0
+        self.active = 0
+        self.completed = 0
+        self.wait_seconds = 0.0
+        self.hash_seconds = 0.0
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        mode = app.config.setdefault('PASSWORD_HASH_MODE', 'auto')
+        if mode not in self.modes:
+            raise ValueError(f'Unknown PASSWORD_HASH_MODE: {mode}')
+        if mode == 'auto':
+            mode = 'eventlet' if _eventlet_patched() else 'thread'
+
+        self.shutdown()
+        self.mode = mode
+        self.workers = app.config.setdefault('PASSWORD_HASH_WORKERS', os.cpu_count() or 2)
+        self._slots = threading.BoundedSemaphore(self.workers)
+        app.extensions['password_hasher'] = self
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password)
+
+    def check(self, hashed, password):
+        if hashed == UNUSABLE_PASSWORD:
+            return False
+        return self._run(check_password_hash, hashed, password)
+
+    def hash_many(self, passwords, processes=None):
+        """
+        Hashea una lista de contraseñas en paralelo y devuelve los hashes en
+        el mismo orden. `processes=True` fuerza el pool de procesos (cargas
+        masivas); por defecto usa el modo configurado.
+        """
+        passwords = list(passwords)
+        mode = 'process' if processes else self.mode
+        start = time.perf_counter()
+
+        if mode == 'inline' or len(passwords) < 2:
+            hashes = [generate_password_hash(password) for password in passwords]
+        elif mode == 'eventlet':
+            from eventlet import GreenPool, tpool
+            pool = GreenPool(self.workers)
+            hashes = list(pool.imap(lambda password: tpool.execute(generate_password_hash, password), passwords))
+        else:
+            chunksize = max(1, len(passwords) // (self.workers * 4)) if mode == 'process' else 1
+            hashes = list(self._executor(mode).map(generate_password_hash, passwords, chunksize=chunksize))
+
+        with self._lock:
+            self.completed += len(passwords)
+            self.hash_seconds += time.perf_counter() - start
+        return hashes
+
+    def _run(self, fn, *args):
+        with self._lock:
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+
+        queued_at = time.perf_counter()
+        with self._slots:
+            started = time.perf_counter()
+            with self._lock:
+                self.queued -= 1
+                self.active += 1
+                self.wait_seconds += started - queued_at
+            try:
+                if self.mode == 'inline':
+                    return fn(*args)
+                if self.mode == 'eventlet':
+                    from eventlet import tpool
+                    return tpool.execute(fn, *args)
+                return self._executor(self.mode).submit(fn, *args).result()
+            finally:
+                with self._lock:
+                    self.active -= 1
+                    self.completed += 1
+                    self.hash_seconds += time.perf_counter() - started
+
+    def _executor(self, mode):
+        executor = self._executors.get(mode)
+        if executor is None:
+            with self._lock:
+                executor = self._executors.get(mode)
+                if executor is None:
+                    if mode == 'process':
+                        executor = ProcessPoolExecutor(max_workers=self.workers)
+                    else:
+                        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hash')
+                    self._executors[mode] = executor
+        return executor
+
+    def shutdown(self):
+        with self._lock:
+            executors, self._executors = self._executors, {}
+        for executor in executors.values():
+            executor.shutdown(wait=True)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'mode': self.mode,
+                'workers': self.workers,
+                'queue_depth': self.queued,
+                'max_queue_depth': self.max_queued,
+                'active': self.active,
+                'completed': self.completed,
+                'wait_seconds_total': round(self.wait_seconds, 6),
+                'hash_seconds_total': round(self.hash_seconds, 6)
+            }
+
+
+password_hasher = PasswordHasher()
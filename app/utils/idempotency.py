@@ -0,0 +1,199 @@
+from collections import namedtuple
+from functools import wraps
+from flask import request, jsonify, g, current_app
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+import hashlib
+import threading
+from app.models import db, IdempotencyRecord
+from app.utils.cache import TTLCache
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+# Respuesta guardada: se devuelve tal cual a los reintentos con la misma clave
+StoredResponse = namedtuple('StoredResponse', ['fingerprint', 'status_code', 'content_type', 'body'])
+
+
+class MemoryIdempotencyStore:
+    """Respuestas en memoria del proceso, acotadas por LRU y con expiración."""
+
+    def __init__(self, max_size=10000):
+        self._cache = TTLCache(max_size=max_size)
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, response, ttl):
+        self._cache.set(key, response, ttl=ttl)
+
+    def stats(self):
+        return self._cache.stats()
+
+
+class SQLIdempotencyStore:
+    """
+    Backend durable en vt_idempotency_keys: se comparte entre procesos y
+    sobrevive reinicios, a costa de una consulta por request con clave.
+    Cada `prune_every` escrituras borra las filas vencidas.
+    """
+
+    def __init__(self, prune_every=1000):
+        self.prune_every = prune_every
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        record = db.session.get(IdempotencyRecord, key)
+        if record is None or record.expires_at <= datetime.utcnow():
+            return None
+        return StoredResponse(record.fingerprint, record.status_code, record.content_type, record.body)
+
+    def set(self, key, response, ttl):
+        now = datetime.utcnow()
+        db.session.merge(IdempotencyRecord(
+            key=key,
+            fingerprint=response.fingerprint,
+            status_code=response.status_code,
+            content_type=response.content_type,
+            body=response.body,
+            expires_at=now + timedelta(seconds=ttl)
+        ))
+
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self.prune_every == 0
+        if prune:
+            IdempotencyRecord.query.filter(IdempotencyRecord.expires_at <= now).delete(synchronize_session=False)
+
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Otro proceso guardó la misma clave primero
+            db.session.rollback()
+
+    def stats(self):
+        return {'writes': self._writes}
+
+
+class IdempotencyLayer:
+    """
+    Registra los backends de Idempotency-Key en la app.
+    - IDEMPOTENCY_BACKEND: 'memory' (por defecto) o 'durable'.
+    - IDEMPOTENCY_TTL: segundos durante los que se responde a los reintentos.
+    - IDEMPOTENCY_CACHE_SIZE: respuestas que conserva el backend en memoria.
+    """
+
+    backends = {
+        'memory': lambda app: MemoryIdempotencyStore(app.config.get('IDEMPOTENCY_CACHE_SIZE', 10000)),
+        'durable': lambda app: SQLIdempotencyStore(),
+    }
+
+    def __init__(self, app=None):
+        self.replays = 0
+        self.mismatches = 0
+        self._in_flight = set()
+        self._lock = threading.Lock()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend = app.config.setdefault('IDEMPOTENCY_BACKEND', 'memory')
+        if backend not in self.backends:
+            raise ValueError(f'Unknown idempotency backend: {backend}')
+
+        app.config.setdefault('IDEMPOTENCY_TTL', 86400)
+        app.extensions['idempotency'] = self.backends[backend](app)
+
+    @property
+    def store(self):
+        return current_app.extensions['idempotency']
+
+    def begin(self, key):
+        """Marca la clave como en curso; False si otro request con la misma clave no terminó."""
+        with self._lock:
+            if key in self._in_flight:
+                return False
+            self._in_flight.add(key)
+            return True
+
+    def end(self, key):
+        with self._lock:
+            self._in_flight.discard(key)
+
+    def count(self, name):
+        """Suma 1 a `replays` o `mismatches`."""
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def stats(self):
+        with self._lock:
+            stats = {'replays': self.replays, 'mismatches': self.mismatches, 'in_flight': len(self._in_flight)}
+        stats.update(self.store.stats())
+        return stats
+
+
+idempotency = IdempotencyLayer()
+
+
+def _scope():
+    """Dueño de la clave: el usuario autenticado, el local del kiosko o, sin ninguno, la IP del cliente."""
+    if hasattr(g, 'user'):
+        return f'user:{g.user.get("user_id")}'
+    if hasattr(g, 'location_id'):
+        return f'location:{g.location_id}'
+    return f'ip:{request.remote_addr}'
+
+
+def _replay(stored):
+    response = current_app.response_class(stored.body, status=stored.status_code, content_type=stored.content_type)
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(f):
+    """
+    Si el request trae Idempotency-Key, guarda la primera respuesta y la
+    repite en los reintentos (misma ruta, mismo cliente, misma clave) sin
+    volver a ejecutar la vista. En rutas sin usuario (p. ej. /auth/register)
+    la clave se asocia a la IP, así dos clientes con la misma clave no
+    reciben la respuesta del otro. Va debajo de los decoradores de autenticación.
+    No se guardan respuestas 5xx ni 429, que sí conviene reintentar, ni 202:
+    un voto encolado sin confirmar todavía no tiene resultado, y el reintento
+    debe ejecutar la vista para conocerlo (201, o 409 si ya se guardó).
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        client_key = request.headers.get(HEADER)
+        if client_key is None:
+            return f(*args, **kwargs)
+
+        if not client_key or len(client_key) > MAX_KEY_LENGTH:
+            return jsonify({'error': 'Invalid Idempotency-Key header'}), 400
+
+        key = hashlib.sha256(f'{request.path}\x00{_scope()}\x00{client_key}'.encode()).hexdigest()
+        fingerprint = hashlib.sha256(request.get_data()).hexdigest()
+
+        stored = idempotency.store.get(key)
+        if stored is not None:
+            if stored.fingerprint != fingerprint:
+                idempotency.count('mismatches')
+                return jsonify({'error': 'Idempotency-Key was already used with a different request'}), 422
+            idempotency.count('replays')
+            return _replay(stored)
+
+        if not idempotency.begin(key):
+            return jsonify({'error': 'A request with this Idempotency-Key is still in progress'}), 409
+
+        try:
+            response = current_app.make_response(f(*args, **kwargs))
+            if response.status_code < 500 and response.status_code not in (202, 429):
+                idempotency.store.set(key, StoredResponse(
+                    fingerprint, response.status_code, response.content_type, response.get_data()
+                ), current_app.config['IDEMPOTENCY_TTL'])
+        finally:
+            idempotency.end(key)
+
+        return response
+    return decorated_function
@@ -0,0 +1,191 @@
+from bisect import bisect_left
+from flask import g, request, has_request_context
+from sqlalchemy import event
+import threading
+import time
+
+# Límites superiores de los buckets (Prometheus: le="...")
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+
+class Histogram:
+    """Histograma de buckets fijos, como los de Prometheus; observe() es O(log buckets)."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # el último es +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def percentile(self, q):
+        """Estimación por interpolación lineal dentro del bucket (como histogram_quantile)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                return lower + (bound - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+            lower = bound
+        return self.buckets[-1]
+
+    def cumulative(self):
+        total = 0
+        for bound, bucket_count in zip(self.buckets + ('+Inf',), self.counts):
+            total += bucket_count
+            yield bound, total
+
+
+class RequestMetrics:
+    """
+    Tiempo total, tiempo en la base y número de sentencias SQL por endpoint.
+    - before_request / teardown_request de Flask miden cada request, también
+      los que terminan en una excepción sin manejar (cuentan como 500).
+    - Las respuestas en streaming (exportaciones) se registran cuando el
+      servidor termina de enviar el cuerpo (response.call_on_close).
+    - before_cursor_execute / after_cursor_execute del engine acumulan el
+      tiempo y las sentencias del request en curso (en g).
+    Los histogramas viven en memoria del proceso; /metrics los expone en
+    formato de texto de Prometheus.
+    - METRICS_ENABLED: registra los hooks (por defecto True).
+    """
+
+    metrics = (
+        ('request_duration_seconds', 'Request wall time in seconds.', TIME_BUCKETS),
+        ('request_db_seconds', 'Time spent executing SQL per request in seconds.', TIME_BUCKETS),
+        ('request_sql_statements', 'SQL statements executed per request.', COUNT_BUCKETS),
+    )
+
+    def __init__(self, prefix='votario'):
+        self.prefix = prefix
+        self._histograms = {}  # (metric, endpoint, method) -> Histogram
+        self._responses = {}   # (endpoint, method, status) -> total
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.extensions['metrics'] = self
+        if not app.config.setdefault('METRICS_ENABLED', True):
+            return
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def register_engine(self, engine):
+        if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    def _before_request(self):
+        g._metrics_start = time.perf_counter()
+        g._metrics_sql = [0, 0.0]
+
+    def _after_request(self, response):
+        if '_metrics_start' not in g:
+            return response
+
+        g._metrics_status = response.status_code
+        if response.is_streamed:
+            # El cuerpo todavía no se envió: se mide cuando el servidor cierra la respuesta
+            response.call_on_close(self._finisher(response.status_code))
+        return response
+
+    def _teardown_request(self, exc=None):
+        if '_metrics_start' in g:
+            # Sin status: la excepción no llegó a convertirse en respuesta
+            self._finisher(g.get('_metrics_status', 500))()
+
+    def _finisher(self, status):
+        """
+        Saca el inicio del request de g y devuelve la función que lo registra.
+        La lista de SQL queda en g: con stream_with_context el generador sigue
+        sumando sus sentencias hasta que se llame a la función.
+        """
+        start = g.pop('_metrics_start')
+        sql = g.get('_metrics_sql', [0, 0.0])
+        endpoint = request.endpoint or 'unmatched'
+        method = request.method
+
+        def finish():
+            self.observe(endpoint, method, status, time.perf_counter() - start, sql[1], sql[0])
+        return finish
+
+    def observe(self, endpoint, method, status, seconds, db_seconds, statements):
+        with self._lock:
+            for (name, _, buckets), value in zip(self.metrics, (seconds, db_seconds, statements)):
+                histogram = self._histograms.get((name, endpoint, method))
+                if histogram is None:
+                    histogram = self._histograms[(name, endpoint, method)] = Histogram(buckets)
+                histogram.observe(value)
+
+            key = (endpoint, method, status)
+            self._responses[key] = self._responses.get(key, 0) + 1
+
+    def summary(self):
+        """p50/p95/p99 por endpoint, para /admin/stats."""
+        with self._lock:
+            return {
+                f'{method} {endpoint}': {
+                    'count': histogram.count,
+                    'p50': _round(histogram.percentile(0.5)),
+                    'p95': _round(histogram.percentile(0.95)),
+                    'p99': _round(histogram.percentile(0.99))
+                }
+                for (name, endpoint, method), histogram in sorted(self._histograms.items())
+                if name == 'request_duration_seconds'
+            }
+
+    def prometheus(self):
+        lines = []
+        with self._lock:
+            name = f'{self.prefix}_requests_total'
+            lines.append(f'# HELP {name} Responses by endpoint, method and status code.')
+            lines.append(f'# TYPE {name} counter')
+            for (endpoint, method, status), total in sorted(self._responses.items()):
+                lines.append(f'{name}{{endpoint="{endpoint}",method="{method}",status="{status}"}} {total}')
+
+            for metric, help_text, _ in self.metrics:
+                name = f'{self.prefix}_{metric}'
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for (hist_name, endpoint, method), histogram in sorted(self._histograms.items()):
+                    if hist_name != metric:
+                        continue
+                    labels = f'endpoint="{endpoint}",method="{method}"'
+                    for bound, total in histogram.cumulative():
+                        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {total}')
+                    lines.append(f'{name}_sum{{{labels}}} {histogram.sum:.6f}')
+                    lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def _round(value):
+    return None if value is None else round(value, 6)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Las sentencias de hilos de fondo (vote writer, retención) no tienen request
+    if context is None or not has_request_context():
+        return
+    sql = g.get('_metrics_sql')
+    start = getattr(context, '_metrics_start', None)
+    if sql is not None and start is not None:
+        sql[0] += 1
+        sql[1] += time.perf_counter() - start
+
+
+request_metrics = RequestMetrics()
@@ -0,0 +1,69 @@
+from flask import request, jsonify, current_app
+from urllib.parse import urlencode
+
+
+def _serialize(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def paginated_response(query, id_column, fields):
+    """
+    Lista paginada por cursor (keyset sobre `id_column`) con proyección de campos.
+    - fields: dict {nombre: columna} con los campos permitidos, en orden.
+    - ?limit=N: tamaño de página (hasta PAGINATION_MAX_LIMIT). Sin ?limit se
+      usa PAGINATION_DEFAULT_LIMIT; por defecto es None y se devuelve la
+      lista completa, como antes de paginar.
+    - ?cursor=ID: devuelve filas con id mayor al cursor.
+    - ?fields=a,b: selecciona solo esas columnas.
+    El cuerpo sigue siendo un arreglo JSON; el siguiente cursor va en el header
+    X-Next-Cursor (y en Link rel="next") cuando hay más filas.
+    """
+    default_limit = current_app.config.get('PAGINATION_DEFAULT_LIMIT')
+    max_limit = current_app.config.get('PAGINATION_MAX_LIMIT', 1000)
+
+    try:
+        limit = request.args.get('limit')
+        limit = int(limit) if limit else default_limit
+        cursor = request.args.get('cursor')
+        cursor = int(cursor) if cursor else None
+    except ValueError:
+        return jsonify({"error": "Invalid limit or cursor"}), 400
+
+    if limit is not None and (limit < 1 or limit > max_limit):
+        return jsonify({"error": f"Limit must be between 1 and {max_limit}"}), 400
+
+    requested = request.args.get('fields')
+    names = [name.strip() for name in requested.split(',') if name.strip()] if requested else list(fields)
+    if not names:
+        return jsonify({"error": "No fields requested"}), 400
+
+    unknown = [name for name in names if name not in fields]
+    if unknown:
+        return jsonify({"error": f"Unknown fields: {', '.join(unknown)}"}), 400
+
+    if cursor is not None:
+        query = query.filter(id_column > cursor)
+
+    # El id siempre se selecciona para poder calcular el siguiente cursor
+    columns = [id_column.label('_cursor')] + [fields[name].label(name) for name in names]
+    query = query.with_entities(*columns).order_by(id_column)
+    if limit is None:
+        rows, has_more = query.all(), False
+    else:
+        rows = query.limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+    response = jsonify([
+        {name: _serialize(row[index + 1]) for index, name in enumerate(names)}
+        for row in rows
+    ])
+
+    if has_more:
+        next_cursor = rows[-1][0]
+        args = request.args.to_dict()
+        args['cursor'] = next_cursor
+        response.headers['X-Next-Cursor'] = str(next_cursor)
+        response.headers['Link'] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+
+    return response, 200
@@ -1,38 +1,167 @@
 from functools import wraps
-from flask import request, jsonify, g
+from flask import request, jsonify, g, current_app
 from datetime import datetime, timedelta
+from collections import OrderedDict, deque
+import threading
+import time
 from app.models import db, RequestLog
 
-def rate_limit(limit=5, seconds=60):
+
+class MemoryRateLimitStore:
+    """
+    Ventana deslizante en memoria, protegida con un lock.
+    Cada clave guarda como máximo `limit` marcas de tiempo y el número de
+    claves está acotado por `max_keys` (se descartan las menos usadas).
+    """
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._windows = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit, seconds):
+        """Registra un intento y devuelve False si la clave superó el límite."""
+        now = time.monotonic()
+
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or window.maxlen != limit:
+                window = deque(maxlen=limit)
+                self._windows[key] = window
+            else:
+                self._windows.move_to_end(key)
+
+            # La ventana está llena y el intento más antiguo sigue dentro del plazo
+            if len(window) >= limit and now - window[0] < seconds:
+                return False
+
+            window.append(now)
+
+            if len(self._windows) > self.max_keys:
+                self._windows.popitem(last=False)
+
+        return True
+
+
+class SQLRateLimitStore:
+    """
+    Backend durable: cuenta y registra cada intento en vt_request_logs.
+    Sobrevive reinicios y se comparte entre procesos, a costa de dos
+    consultas y un commit por request.
+    """
+
+    def hit(self, key, limit, seconds):
+        ip, route, user_id = key
+        window_start = datetime.utcnow() - timedelta(seconds=seconds)
+
+        query = RequestLog.query.filter(
+            RequestLog.ip == ip,
+            RequestLog.route == route,
+            RequestLog.timestamp >= window_start
+        )
+
+        if user_id:
+            query = query.filter(RequestLog.user_id == user_id)
+
+        if query.count() >= limit:
+            return False
+
+        # Log this request
+        log = RequestLog(ip=ip, route=route, user_id=user_id, timestamp=datetime.utcnow())
+        db.session.add(log)
+        db.session.commit()
+
+        return True
+
+
+class StateRateLimitStore:
+    """
+    Backend sobre un StateStore (app/utils/state.py), compartido entre
+    workers con STATE_BACKEND='sqlite'. Ventana deslizante aproximada con
+    dos contadores de ventana fija: el anterior pondera según cuánto de él
+    sigue dentro del plazo. Un incr atómico y un get por request.
+    """
+
+    def __init__(self, state):
+        self.state = state
+
+    def hit(self, key, limit, seconds):
+        ip, route, user_id = key
+        now = time.time()
+        window = int(now // seconds)
+        prefix = f'ratelimit:{ip}:{route}:{user_id}:{seconds}:'
+
+        previous = self.state.get(prefix + str(window - 1), 0)
+        current = self.state.incr(prefix + str(window), ttl=seconds * 2)
+
+        elapsed = now / seconds - window
+        return previous * (1 - elapsed) + current <= limit
+
+
+class RateLimiter:
+    """
+    Registra los backends de rate limiting en la app.
+    - RATELIMIT_BACKEND: 'memory' (por defecto), 'shared' (StateStore de la
+      app, ver app/utils/state.py) o 'durable'.
+    - RATELIMIT_MAX_KEYS: claves que conserva el backend en memoria.
+    """
+
+    backends = {
+        'memory': lambda app: MemoryRateLimitStore(app.config.get('RATELIMIT_MAX_KEYS', 10000)),
+        'shared': lambda app: StateRateLimitStore(app.extensions['state']),
+        'durable': lambda app: SQLRateLimitStore(),
+    }
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        default = app.config.setdefault('RATELIMIT_BACKEND', 'memory')
+        if default not in self.backends:
+            raise ValueError(f'Unknown rate limit backend: {default}')
+
+        app.extensions['ratelimit'] = {
+            'default': default,
+            'stores': {name: factory(app) for name, factory in self.backends.items()},
+        }
+
+    def get_store(self, backend=None):
+        state = current_app.extensions['ratelimit']
+        return state['stores'][backend or state['default']]
+
+
+limiter = RateLimiter()
+
+# Ventanas (en segundos) de todos los @rate_limit declarados; la retención
+# de vt_request_logs conserva al menos la más larga.
+registered_windows = set()
+
+
+def max_window(default=60):
+    return max(registered_windows, default=default)
+
+
+def rate_limit(limit=5, seconds=60, backend=None):
+    """
+    Limita los intentos por (ip, ruta, usuario) dentro de una ventana de `seconds`.
+    `backend` permite forzar un backend concreto, p. ej. rate_limit(backend='durable').
+    """
+    registered_windows.add(seconds)
+
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
             ip = request.remote_addr
             route = request.path
-            user_id = getattr(g.user, 'user_id', None) if hasattr(g, 'user') else None
-            window_start = datetime.utcnow() - timedelta(seconds=seconds)
-
-            query = RequestLog.query.filter(
-                RequestLog.ip == ip,
-                RequestLog.route == route,
-                RequestLog.timestamp >= window_start
-            )
-
-            if user_id:
-                query = query.filter(RequestLog.user_id == user_id)
+            user_id = g.user.get('user_id') if hasattr(g, 'user') else None
 
-            recent_requests = query.count()
-
-            if recent_requests >= limit:
+            store = limiter.get_store(backend)
+            if not store.hit((ip, route, user_id), limit, seconds):
                 return jsonify({
                     'error': 'Too many requests. Please wait before trying again.'
                 }), 429
 
-            # Log this request
-            log = RequestLog(ip=ip, route=route, user_id=user_id, timestamp=datetime.utcnow())
-            db.session.add(log)
-            db.session.commit()
-
             return f(*args, **kwargs)
         return decorated_function
     return decorator
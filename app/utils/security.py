@@ -1,10 +1,14 @@
 import os
 from functools import wraps
-from flask import request, jsonify, g
+from flask import request, jsonify, g, current_app
 import jwt
 import datetime
+import hashlib
 import os
-from app.models import User
+import threading
+import time
+from app.models import db, User, VotingLocation
+from app.utils.cache import TTLCache
 
 def require_api_key(env_key_name='ADMIN_API_KEY'):
     """
@@ -26,6 +30,85 @@ def require_api_key(env_key_name='ADMIN_API_KEY'):
     return decorator
 
 
+class LocationKeyIndex:
+    """
+    Índice en memoria {sha256(api_key): location_id} de los locales activos,
+    y de la ubicación (región, provincia, distrito) de cada uno, para
+    autenticar kioskos sin consultar la base en cada request.
+    Se precarga al arrancar cada worker (app.start_background_jobs; si no,
+    en el primer uso), se recarga cuando los handlers de locales
+    llaman a invalidate() y, para ver cambios hechos por otros procesos,
+    cada LOCATION_KEY_REFRESH_INTERVAL segundos.
+    """
+
+    def __init__(self, refresh_interval=60):
+        self.refresh_interval = refresh_interval
+        self._index = {}
+        self._areas = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.refresh_interval = app.config.setdefault('LOCATION_KEY_REFRESH_INTERVAL', self.refresh_interval)
+        app.extensions['location_keys'] = self
+
+    @staticmethod
+    def digest(api_key):
+        return hashlib.sha256(api_key.encode()).digest()
+
+    def lookup(self, api_key):
+        """Devuelve el id del local dueño de la clave, o None."""
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at > self.refresh_interval:
+            self.reload()
+        return self._index.get(self.digest(api_key))
+
+    def area(self, location_id):
+        """(región, provincia, distrito) del local, o None si no está activo."""
+        return self._areas.get(location_id)
+
+    def reload(self):
+        rows = db.session.query(
+            VotingLocation.id,
+            VotingLocation.api_key,
+            VotingLocation.region,
+            VotingLocation.province,
+            VotingLocation.district
+        ).filter(VotingLocation.status == 'active').all()
+        index = {self.digest(row.api_key): row.id for row in rows}
+        areas = {row.id: (row.region, row.province, row.district) for row in rows}
+
+        with self._lock:
+            self._index = index
+            self._areas = areas
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+
+location_keys = LocationKeyIndex()
+
+
+def require_location_key(f):
+    """
+    Protege rutas de kioskos con la api_key del local (header 'x-location-key').
+    Deja el id del local en g.location_id.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        api_key = request.headers.get('x-location-key')
+        location_id = location_keys.lookup(api_key) if api_key else None
+
+        if location_id is None:
+            return jsonify({'error': 'Unauthorized: Invalid or missing location key'}), 401
+
+        g.location_id = location_id
+        return f(*args, **kwargs)
+    return decorated
+
+
 def generate_jwt(user_id, role_name, expires_in=360):
     """
     Genera un JWT con el ID de usuario y rol.
@@ -39,12 +122,74 @@ def generate_jwt(user_id, role_name, expires_in=360):
         'exp': datetime.datetime.utcnow() + datetime.timedelta(seconds=expires_in)
     }
 
-    secret = os.getenv('JWT_SECRET_KEY', 'default-secret')
+    secret = current_app.config['JWT_SECRET_KEY']
     token = jwt.encode(payload, secret, algorithm='HS256')
 
     return token
 
 
+PASSWORD_TOKEN_AUDIENCE = 'votario:password'
+
+
+def _password_fingerprint(hashed):
+    # Cambia con cada contraseña nueva, así el token sirve una sola vez
+    return hashlib.sha256(hashed.encode()).hexdigest()[:16]
+
+
+def generate_password_token(user, expires_in=None):
+    """
+    Token firmado para que el usuario defina o restablezca su contraseña
+    (POST /auth/password/reset). Vence a los PASSWORD_TOKEN_TTL segundos y
+    deja de servir en cuanto la contraseña cambia. Su 'aud' impide usarlo
+    como token de sesión.
+    """
+    expires_in = expires_in or current_app.config.get('PASSWORD_TOKEN_TTL', 7 * 86400)
+    payload = {
+        'user_id': user.id,
+        'pwd': _password_fingerprint(user.password),
+        'aud': PASSWORD_TOKEN_AUDIENCE,
+        'exp': datetime.datetime.utcnow() + datetime.timedelta(seconds=expires_in)
+    }
+    return jwt.encode(payload, current_app.config['JWT_SECRET_KEY'], algorithm='HS256')
+
+
+def verify_password_token(token):
+    """Devuelve el User del token, o None si es inválido, venció o ya se usó."""
+    try:
+        payload = jwt.decode(
+            token, current_app.config['JWT_SECRET_KEY'],
+            algorithms=['HS256'], audience=PASSWORD_TOKEN_AUDIENCE
+        )
+    except jwt.InvalidTokenError:
+        return None
+
+    user = db.session.get(User, payload.get('user_id'))
+    if user is None or user.status == 'deleted' or payload.get('pwd') != _password_fingerprint(user.password):
+        return None
+    return user
+
+
+# Tokens ya verificados, por digest; cada entrada expira con el 'exp' del token
+verified_tokens = TTLCache(max_size=10000)
+
+
+def decode_jwt(token):
+    """
+    Decodifica y verifica el token, o lo toma de la cache de tokens verificados.
+    Lanza las mismas excepciones que jwt.decode.
+    """
+    digest = hashlib.sha256(token.encode()).digest()
+    payload = verified_tokens.get(digest)
+
+    if payload is None:
+        payload = jwt.decode(token, current_app.config['JWT_SECRET_KEY'], algorithms=['HS256'])
+        ttl = payload['exp'] - time.time() if 'exp' in payload else None
+        if ttl is None or ttl > 0:
+            verified_tokens.set(digest, payload, ttl=ttl)
+
+    return dict(payload)
+
+
 def jwt_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
@@ -53,10 +198,9 @@ def jwt_required(f):
             return jsonify({'error': 'Missing or invalid Authorization header'}), 401
 
         token = auth_header.split(' ')[1]
-        secret_key = os.getenv('JWT_SECRET_KEY', 'default-secret')
 
         try:
-            payload = jwt.decode(token, secret_key, algorithms=['HS256'])
+            payload = decode_jwt(token)
 
             # Comparar el User-Agent actual con el del token
             current_ua = request.headers.get('User-Agent', 'unknown')
@@ -73,19 +217,49 @@ def jwt_required(f):
     return decorated
 
 
+class UserStatusCache(TTLCache):
+    """
+    Cache corto del `status` de cada usuario, para no consultar vt_users en
+    cada request protegida. Quien cambie el status de un usuario debe
+    llamar a invalidate(user_id).
+    - USER_STATUS_CACHE_TTL: segundos que vive una entrada (por defecto 5).
+    - USER_STATUS_CACHE_SIZE: usuarios en memoria (por defecto 10000).
+    """
+
+    def init_app(self, app):
+        self.configure(
+            max_size=app.config.setdefault('USER_STATUS_CACHE_SIZE', self.max_size),
+            ttl=app.config.setdefault('USER_STATUS_CACHE_TTL', self.ttl)
+        )
+        app.extensions['user_status_cache'] = self
+
+    def get_status(self, user_id):
+        """Devuelve el status del usuario o None si no existe."""
+        status = self.get(user_id)
+        if status is None:
+            status = db.session.query(User.status).filter(User.id == user_id).scalar()
+            if status is not None:
+                self.set(user_id, status)
+        return status
+
+    def invalidate(self, user_id):
+        self.pop(user_id)
+
+
+user_status_cache = UserStatusCache(max_size=10000, ttl=5)
+
+
 def active_user_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
         user_id = g.user.get('user_id')
-        user = User.query.get(user_id)
+        status = user_status_cache.get_status(user_id)
 
-        if not user:
+        if status is None:
             return jsonify({'error': 'User not found'}), 404
-        if user.status != 'active':
+        if status != 'active':
             return jsonify({'error': 'User is not active'}), 403
 
-        g.user_db = user  # opcional: guarda el objeto completo si lo necesitas en la vista
-
         return f(*args, **kwargs)
     return decorated
 
@@ -0,0 +1,262 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Valor de `expected` en compare_and_set para "la clave no existe (o venció)"
+MISSING = None
+
+
+class StateStore(ABC):
+    """
+    Estado compartido clave → valor con expiración. Los valores deben ser
+    serializables a JSON; los contadores son enteros.
+    - incr(key, amount=1, ttl=None): suma atómica; si la clave no existe (o
+      venció) empieza de cero y toma `ttl`. Devuelve el valor nuevo.
+    - get(key, default=None) / set(key, value, ttl=None) / delete(key).
+    - compare_and_set(key, expected, value, ttl=None): escribe solo si el
+      valor actual es `expected` (MISSING = no existe). Devuelve True si escribió.
+    """
+
+    @abstractmethod
+    def incr(self, key, amount=1, ttl=None):
+        ...
+
+    @abstractmethod
+    def get(self, key, default=None):
+        ...
+
+    @abstractmethod
+    def set(self, key, value, ttl=None):
+        ...
+
+    @abstractmethod
+    def compare_and_set(self, key, expected, value, ttl=None):
+        ...
+
+    @abstractmethod
+    def delete(self, key):
+        ...
+
+
+class MemoryStateStore(StateStore):
+    """En memoria del proceso, protegido con un lock y acotado a `max_keys` (LRU)."""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._entries = OrderedDict()  # key -> (expires_at | None, value)
+        self._lock = threading.Lock()
+
+    def _current(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return MISSING
+        if entry[0] is not None and entry[0] <= now:
+            del self._entries[key]
+            return MISSING
+        return entry[1]
+
+    def _store(self, key, value, expires):
+        self._entries[key] = (expires, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_keys:
+            self._entries.popitem(last=False)
+
+    def incr(self, key, amount=1, ttl=None):
+        now = time.time()
+        with self._lock:
+            current = self._current(key, now)
+            if current is MISSING:
+                value, expires = amount, (now + ttl if ttl else None)
+            else:
+                value, expires = current + amount, self._entries[key][0]
+            self._store(key, value, expires)
+            return value
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._current(key, time.time())
+            return default if value is MISSING else value
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        with self._lock:
+            self._store(key, value, now + ttl if ttl else None)
+
+    def compare_and_set(self, key, expected, value, ttl=None):
+        now = time.time()
+        with self._lock:
+            if self._current(key, now) != expected:
+                return False
+            self._store(key, value, now + ttl if ttl else None)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class SQLiteStateStore(StateStore):
+    """
+    Compartido entre procesos de la misma máquina mediante un archivo SQLite
+    en modo WAL (lecturas concurrentes, una escritura a la vez). Cada hilo
+    abre su propia conexión; las operaciones atómicas usan un solo UPSERT o
+    una transacción BEGIN IMMEDIATE. Cada `purge_every` escrituras se borran
+    las claves vencidas.
+    """
+
+    def __init__(self, path, busy_timeout=5.0, purge_every=1000):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.purge_every = purge_every
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS vt_state ('
+                'key TEXT PRIMARY KEY, value, expires_at REAL)'
+            )
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    @property
+    def _conn(self):
+        # Las conexiones no se heredan entre procesos (fork) ni se comparten entre hilos
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = self._local.conn = self._connect()
+            self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def _decode(value):
+        return value if isinstance(value, (int, float)) or value is None else json.loads(value)
+
+    @staticmethod
+    def _encode(value):
+        return value if isinstance(value, int) and not isinstance(value, bool) else json.dumps(value)
+
+    def _wrote(self, conn, now):
+        with self._writes_lock:
+            self._writes += 1
+            purge = self._writes % self.purge_every == 0
+        if purge:
+            conn.execute('DELETE FROM vt_state WHERE expires_at <= ?', (now,))
+
+    def incr(self, key, amount=1, ttl=None):
+        now = time.time()
+        conn = self._conn
+        (value,) = conn.execute(
+            'INSERT INTO vt_state (key, value, expires_at) VALUES (?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET '
+            '  value = CASE WHEN expires_at <= ? THEN excluded.value ELSE value + excluded.value END, '
+            '  expires_at = CASE WHEN expires_at <= ? THEN excluded.expires_at ELSE expires_at END '
+            'RETURNING value',
+            (key, amount, now + ttl if ttl else None, now, now)
+        ).fetchone()
+        self._wrote(conn, now)
+        return value
+
+    def get(self, key, default=None):
+        row = self._conn.execute(
+            'SELECT value FROM vt_state WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)',
+            (key, time.time())
+        ).fetchone()
+        return default if row is None else self._decode(row[0])
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        conn = self._conn
+        conn.execute(
+            'INSERT OR REPLACE INTO vt_state (key, value, expires_at) VALUES (?, ?, ?)',
+            (key, self._encode(value), now + ttl if ttl else None)
+        )
+        self._wrote(conn, now)
+
+    def compare_and_set(self, key, expected, value, ttl=None):
+        now = time.time()
+        conn = self._conn
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT value FROM vt_state WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)',
+                (key, now)
+            ).fetchone()
+            current = MISSING if row is None else self._decode(row[0])
+            if current != expected:
+                conn.execute('ROLLBACK')
+                return False
+
+            conn.execute(
+                'INSERT OR REPLACE INTO vt_state (key, value, expires_at) VALUES (?, ?, ?)',
+                (key, self._encode(value), now + ttl if ttl else None)
+            )
+            conn.execute('COMMIT')
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+
+        self._wrote(conn, now)
+        return True
+
+    def delete(self, key):
+        self._conn.execute('DELETE FROM vt_state WHERE key = ?', (key,))
+
+
+class SharedState:
+    """
+    Registra el StateStore de la app (app.extensions['state']).
+    - STATE_BACKEND: 'memory' (por defecto) o 'sqlite' (varios procesos).
+    - STATE_SQLITE_PATH: archivo del backend 'sqlite' (por defecto en instance/).
+    - STATE_MAX_KEYS: claves del backend en memoria.
+    """
+
+    backends = {
+        'memory': lambda app: MemoryStateStore(app.config.get('STATE_MAX_KEYS', 100000)),
+        'sqlite': lambda app: SQLiteStateStore(
+            app.config.get('STATE_SQLITE_PATH') or os.path.join(app.instance_path, 'votario-state.db')
+        ),
+    }
+
+    def __init__(self, app=None):
+        self.store = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend = app.config.setdefault('STATE_BACKEND', 'memory')
+        if backend not in self.backends:
+            raise ValueError(f'Unknown state backend: {backend}')
+        if backend == 'sqlite':
+            os.makedirs(app.instance_path, exist_ok=True)
+
+        self.store = self.backends[backend](app)
+        app.extensions['state'] = self.store
+
+    def incr(self, key, amount=1, ttl=None):
+        return self.store.incr(key, amount, ttl)
+
+    def get(self, key, default=None):
+        return self.store.get(key, default)
+
+    def set(self, key, value, ttl=None):
+        self.store.set(key, value, ttl)
+
+    def compare_and_set(self, key, expected, value, ttl=None):
+        return self.store.compare_and_set(key, expected, value, ttl)
+
+    def delete(self, key):
+        self.store.delete(key)
+
+
+shared_state = SharedState()
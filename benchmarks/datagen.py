@@ -0,0 +1,122 @@
+"""
+Genera datos sintéticos de una elección a través de app.models.
+
+Crea los roles, N votantes (todos con la misma contraseña, hasheada una sola
+vez), locales de votación y eventos abiertos con sus secciones y opciones.
+
+Uso:
+    DATABASE_URL=postgresql://... python -m benchmarks.datagen --voters 10000
+"""
+import argparse
+import os
+import secrets
+import time
+from datetime import datetime, timedelta
+
+REGIONS = ['Lima', 'Cusco', 'Arequipa', 'Piura', 'Loreto']
+PASSWORD = 'bench-password'
+
+
+def generate(voters=1000, events=1, sections=3, options=4, locations=10, password=PASSWORD, batch_size=5000):
+    """
+    Inserta los datos en la base de la app actual (requiere app context).
+    Devuelve un dict con los emails de los votantes y la papeleta de cada
+    evento: {'voters': [...], 'events': [{'event_id', 'sections': {section_id: [option_id, ...]}}]}.
+    """
+    from werkzeug.security import generate_password_hash
+    from app.models import db, Role, User, Event, Section, Option, VotingLocation
+
+    roles = {role.name: role for role in Role.query.all()}
+    for name in ('admin', 'moderator', 'voter'):
+        if name not in roles:
+            roles[name] = Role(name=name)
+            db.session.add(roles[name])
+    db.session.flush()
+
+    db.session.add_all(
+        VotingLocation(
+            name=f'Local {i}',
+            region=REGIONS[i % len(REGIONS)],
+            province=REGIONS[i % len(REGIONS)],
+            district=f'Distrito {i}',
+            api_key=secrets.token_hex(32)
+        )
+        for i in range(locations)
+    )
+
+    # Un solo hash para todos: el costo de hashear no es lo que se mide aquí
+    hashed = generate_password_hash(password)
+    run = secrets.token_hex(4)
+    emails = [f'voter{i}.{run}@bench.pe' for i in range(voters)]
+    for start in range(0, voters, batch_size):
+        db.session.execute(db.insert(User), [
+            {
+                'email': email,
+                'password': hashed,
+                'role_id': roles['voter'].id,
+                'document_number': f'{run}{i:08d}'[-15:],
+                'region': REGIONS[i % len(REGIONS)],
+                'province': REGIONS[i % len(REGIONS)],
+                'district': f'Distrito {i % (locations or 1)}',
+                'status': 'active',
+                'failed_login_attempts': 0
+            }
+            for i, email in enumerate(emails[start:start + batch_size], start=start)
+        ])
+
+    now = datetime.utcnow()
+    ballots = []
+    for e in range(events):
+        election = Event(
+            name=f'Bench {run} #{e}',
+            start_datetime=now - timedelta(hours=1),
+            end_datetime=now + timedelta(days=1)
+        )
+        db.session.add(election)
+        db.session.flush()
+
+        ballot = {'event_id': election.id, 'sections': {}}
+        for s in range(sections):
+            section = Section(name=f'Sección {s}', event_id=election.id)
+            db.session.add(section)
+            db.session.flush()
+
+            choices = [Option(label=f'Opción {o}', section_id=section.id) for o in range(options)]
+            db.session.add_all(choices)
+            db.session.flush()
+            ballot['sections'][section.id] = [choice.id for choice in choices]
+        ballots.append(ballot)
+
+    db.session.commit()
+    return {'voters': emails, 'password': password, 'events': ballots}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--voters', type=int, default=1000)
+    parser.add_argument('--events', type=int, default=1)
+    parser.add_argument('--sections', type=int, default=3)
+    parser.add_argument('--options', type=int, default=4)
+    parser.add_argument('--locations', type=int, default=10)
+    args = parser.parse_args()
+
+    if 'DATABASE_URL' not in os.environ:
+        parser.error('DATABASE_URL is required')
+
+    from app import create_app
+    from app.models import db
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        start = time.perf_counter()
+        data = generate(args.voters, args.events, args.sections, args.options, args.locations)
+        elapsed = time.perf_counter() - start
+
+    print(f'{args.voters} voters, {args.events} events, {args.locations} locations in {elapsed:.1f}s')
+    for ballot in data['events']:
+        print(f'event {ballot["event_id"]}: sections {sorted(ballot["sections"])}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Micro-benchmark del costo por request de @jwt_required, con y sin la cache
+de tokens verificados.
+
+Uso:
+    python -m benchmarks.jwt_overhead --iterations 20000
+"""
+import argparse
+import os
+import time
+
+
+def measure(view, app, headers, iterations, clear_cache):
+    from app.utils.security import verified_tokens
+
+    with app.test_request_context('/bench', headers=headers):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            if clear_cache:
+                verified_tokens.clear()
+            view()
+        elapsed = time.perf_counter() - start
+
+    return elapsed / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+
+    os.environ.setdefault('DATABASE_URL', 'sqlite://')
+    os.environ.setdefault('JWT_SECRET_KEY', 'bench-secret-bench-secret-bench-secret')
+
+    from app import create_app
+    from app.utils.security import generate_jwt, jwt_required, verified_tokens
+
+    app = create_app()
+    headers = {'User-Agent': 'bench'}
+
+    with app.test_request_context('/', headers=headers):
+        token = generate_jwt(1, 'voter')
+    headers['Authorization'] = f'Bearer {token}'
+
+    @jwt_required
+    def view():
+        return 'ok'
+
+    baseline = measure(lambda: 'ok', app, headers, args.iterations, clear_cache=False)
+    uncached = measure(view, app, headers, args.iterations, clear_cache=True)
+    cached = measure(view, app, headers, args.iterations, clear_cache=False)
+
+    print(f'no decorator:      {baseline:8.2f} us/request')
+    print(f'decode every time: {uncached - baseline:8.2f} us/request overhead')
+    print(f'verified cache:    {cached - baseline:8.2f} us/request overhead')
+    print(f'cache stats: {verified_tokens.stats()}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+"""
+Prueba de carga del flujo real de votación: /auth/login → /vote.
+
+Siembra votantes y un evento con benchmarks.datagen y lanza `--concurrency`
+votantes simulados en paralelo; cada uno inicia sesión y vota en todas las
+secciones. Reporta throughput, latencias p50/p95/p99 por endpoint y
+sentencias SQL por request (leídas de las métricas de /metrics), y guarda
+el resultado en JSON para comparar contra una línea base.
+
+Por defecto corre dentro del proceso (cliente de pruebas de Flask) sobre
+un SQLite temporal. Con --url ataca un servidor en marcha; DATABASE_URL
+debe apuntar a la misma base que usa ese servidor.
+
+Uso:
+    python -m benchmarks.load_test --voters 500 --concurrency 16
+    DATABASE_URL=postgresql://... python -m benchmarks.load_test --url http://localhost:5000 \\
+        --output results/baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from benchmarks.datagen import generate
+
+ENDPOINTS = {'/auth/login': 'votario.login', '/vote': 'votario.cast_vote'}
+METRIC_LINE = re.compile(r'^votario_request_sql_statements_(sum|count)\{endpoint="([^"]+)",method="POST"\} (\S+)$')
+
+
+class InProcessClient:
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def post(self, path, body, headers):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.post(path, json=body, headers=headers)
+        return response.status_code, response.get_json(silent=True)
+
+    def metrics(self, admin_key):
+        from app.utils.metrics import request_metrics
+        return request_metrics.prometheus()
+
+
+class HTTPClient:
+    def __init__(self, url):
+        self.url = url.rstrip('/')
+
+    def post(self, path, body, headers):
+        request = urllib.request.Request(
+            self.url + path,
+            data=json.dumps(body).encode(),
+            headers={**headers, 'Content-Type': 'application/json'},
+            method='POST'
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                return response.status, json.loads(response.read() or b'null')
+        except urllib.error.HTTPError as e:
+            return e.code, None
+
+    def metrics(self, admin_key):
+        request = urllib.request.Request(self.url + '/metrics', headers={'x-api-key': admin_key})
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                return response.read().decode()
+        except urllib.error.URLError:
+            return ''
+
+
+def sql_statements(text):
+    """{endpoint: (suma de sentencias, requests)} desde el texto de /metrics."""
+    totals = defaultdict(lambda: [0.0, 0])
+    for line in text.splitlines():
+        match = METRIC_LINE.match(line)
+        if match:
+            kind, endpoint, value = match.groups()
+            totals[endpoint][0 if kind == 'sum' else 1] = float(value)
+    return totals
+
+
+def percentile(samples, q):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(q * len(ordered))) - 1))
+    return ordered[index]
+
+
+def run(client, data, concurrency):
+    auth_key = os.environ['AUTH_API_KEY']
+    votes_key = os.environ['VOTES_API_KEY']
+    ballot = data['events'][0]
+    latencies = defaultdict(list)
+    statuses = defaultdict(lambda: defaultdict(int))
+    lock = threading.Lock()
+
+    def timed(path, body, headers):
+        start = time.perf_counter()
+        status, payload = client.post(path, body, headers)
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies[path].append(elapsed)
+            statuses[path][status] += 1
+        return status, payload
+
+    def voter(email):
+        status, payload = timed('/auth/login', {'email': email, 'password': data['password']},
+                                {'x-api-key': auth_key, 'User-Agent': 'load-test'})
+        if status != 200:
+            return
+        headers = {
+            'x-api-key': votes_key,
+            'User-Agent': 'load-test',
+            'Authorization': f'Bearer {payload["token"]}'
+        }
+        for section_id, option_ids in ballot['sections'].items():
+            timed('/vote', {
+                'event_id': ballot['event_id'],
+                'section_id': section_id,
+                'option_id': random.choice(option_ids)
+            }, headers)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(voter, data['voters']))
+    elapsed = time.perf_counter() - start
+
+    return elapsed, latencies, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--voters', type=int, default=500)
+    parser.add_argument('--sections', type=int, default=3)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--url', help='Servidor en marcha (por defecto, dentro del proceso)')
+    parser.add_argument('--output', help='Guarda los resultados en este archivo JSON')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.url and 'DATABASE_URL' not in os.environ:
+            parser.error('--url requires DATABASE_URL pointing at the server database')
+        os.environ.setdefault('DATABASE_URL', f'sqlite:///{os.path.join(tmp, "load.db")}')
+        os.environ.setdefault('ADMIN_API_KEY', 'bench-admin-key')
+        os.environ.setdefault('AUTH_API_KEY', 'bench-auth-key')
+        os.environ.setdefault('VOTES_API_KEY', 'bench-votes-key')
+        os.environ.setdefault('JWT_SECRET_KEY', 'bench-secret-bench-secret-bench-secret')
+
+        from app import create_app
+        from app.models import db
+
+        app = create_app()
+        with app.app_context():
+            db.create_all()
+            data = generate(voters=args.voters, sections=args.sections)
+            dialect = db.engine.dialect.name
+
+        client = HTTPClient(args.url) if args.url else InProcessClient(app)
+        before = sql_statements(client.metrics(os.environ['ADMIN_API_KEY']))
+        elapsed, latencies, statuses = run(client, data, args.concurrency)
+        after = sql_statements(client.metrics(os.environ['ADMIN_API_KEY']))
+
+    requests = sum(len(samples) for samples in latencies.values())
+    results = {
+        'timestamp': datetime.utcnow().isoformat(),
+        'config': {
+            'voters': args.voters,
+            'sections': args.sections,
+            'concurrency': args.concurrency,
+            'target': args.url or 'in-process',
+            'database': dialect,
+            'vote_ingestion_mode': os.environ.get('VOTE_INGESTION_MODE', 'direct'),
+            'python': platform.python_version()
+        },
+        'elapsed_seconds': round(elapsed, 3),
+        'requests': requests,
+        'requests_per_second': round(requests / elapsed, 1),
+        'votes_per_second': round(statuses['/vote'].get(201, 0) / elapsed, 1),
+        'endpoints': {}
+    }
+
+    for path, samples in latencies.items():
+        endpoint = ENDPOINTS[path]
+        statements = after[endpoint][0] - before[endpoint][0]
+        counted = after[endpoint][1] - before[endpoint][1]
+        results['endpoints'][path] = {
+            'requests': len(samples),
+            'status_codes': dict(statuses[path]),
+            'p50_ms': round(percentile(samples, 0.50) * 1000, 2),
+            'p95_ms': round(percentile(samples, 0.95) * 1000, 2),
+            'p99_ms': round(percentile(samples, 0.99) * 1000, 2),
+            'queries_per_request': round(statements / counted, 2) if counted else None
+        }
+
+    print(f'{requests} requests in {elapsed:.2f}s: {results["requests_per_second"]} req/s, '
+          f'{results["votes_per_second"]} votes/s ({args.concurrency} concurrent voters, {dialect})')
+    for path, stats in results['endpoints'].items():
+        print(f'  {path:<12} p50 {stats["p50_ms"]:>8} ms  p95 {stats["p95_ms"]:>8} ms  '
+              f'p99 {stats["p99_ms"]:>8} ms  {stats["queries_per_request"]} queries/request  '
+              f'{stats["status_codes"]}')
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as handle:
+            json.dump(results, handle, indent=2)
+        print(f'Results saved to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+"""
+Verifica los planes de ejecución de las consultas de los controladores.
+
+Recorre los endpoints principales con el cliente de pruebas sobre datos
+sembrados, captura cada SELECT que llega a la base y lo pasa por EXPLAIN.
+Termina con código 1 si alguna consulta recorre una tabla completa:
+- SQLite: 'SCAN <tabla>' sin índice.
+- PostgreSQL: 'Seq Scan' con enable_seqscan = off (con pocas filas el
+  planificador prefiere el scan secuencial aunque exista el índice).
+
+Uso:
+    python -m benchmarks.query_plans [--output plans.json]
+    DATABASE_URL=postgresql://... python -m benchmarks.query_plans
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+from flask import has_request_context, request
+from sqlalchemy import event
+
+# Tablas de catálogo que se leen completas a propósito
+ALLOWED_SCANS = {'vt_roles'}
+
+SQLITE_SCAN = re.compile(r'\bSCAN (\w+)\b(?! USING)')
+POSTGRES_SCAN = re.compile(r'Seq Scan on (\w+)')
+
+
+def seed(events=3, sections=4, options=5, voters=200):
+    from app.models import db, Role, User, Event, Section, Option, Vote, VotingLocation, RequestLog
+
+    for name in ('admin', 'moderator', 'voter'):
+        db.session.add(Role(name=name))
+    db.session.flush()
+    voter_role = Role.query.filter_by(name='voter').one()
+
+    users = [
+        User(email=f'voter{i}@bench.pe', password='x', role_id=voter_role.id,
+             region='Lima', province='Lima', district=f'D{i % 10}')
+        for i in range(voters)
+    ]
+    db.session.add_all(users)
+    db.session.add(VotingLocation(name='Local', region='Lima', province='Lima', district='D0', api_key='bench'))
+
+    now = datetime.utcnow()
+    for e in range(events):
+        election = Event(name=f'E{e}', start_datetime=now - timedelta(hours=1), end_datetime=now + timedelta(hours=1))
+        db.session.add(election)
+        db.session.flush()
+        for s in range(sections):
+            section = Section(name=f'S{s}', event_id=election.id)
+            db.session.add(section)
+            db.session.flush()
+            choices = [Option(label=f'O{o}', section_id=section.id) for o in range(options)]
+            db.session.add_all(choices)
+            db.session.flush()
+            db.session.add_all(
+                Vote(user_id=user.id, section_id=section.id, option_id=choices[i % options].id)
+                for i, user in enumerate(users)
+            )
+
+    db.session.add_all(
+        RequestLog(ip=f'10.0.0.{i % 50}', route='/vote', user_id=i, timestamp=now - timedelta(seconds=i))
+        for i in range(1000)
+    )
+    db.session.commit()
+
+
+def capture(engine):
+    """Lista de (endpoint, sql, parámetros) con cada SELECT ejecutado en un request."""
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if has_request_context() and statement.lstrip().upper().startswith('SELECT'):
+            captured.append((request.endpoint or request.path, statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    return captured
+
+
+def drive(app):
+    from app.models import db, User, Event, Section, Option
+    from app.utils.ratelimit import SQLRateLimitStore
+
+    client = app.test_client()
+    admin_key = os.environ['ADMIN_API_KEY']
+
+    with app.app_context():
+        event_id = db.session.query(Event.id).order_by(Event.id).first()[0]
+        section_id, option_id = db.session.query(Section.id, Option.id).\
+            join(Option, Option.section_id == Section.id).\
+            filter(Section.event_id == event_id).first()
+        voter = User.query.order_by(User.id).first()
+        admin = User(email='admin@bench.pe', password='x', role_id=1)
+        db.session.add(admin)
+        db.session.commit()
+        admin_id, voter_id = admin.id, voter.id
+
+    from app.utils.security import generate_jwt
+    with app.test_request_context(headers={'User-Agent': 'bench'}):
+        admin_headers = {'x-api-key': admin_key, 'User-Agent': 'bench',
+                         'Authorization': f'Bearer {generate_jwt(admin_id, "admin")}'}
+        voter_headers = {'x-api-key': os.environ['VOTES_API_KEY'], 'User-Agent': 'bench',
+                         'Authorization': f'Bearer {generate_jwt(voter_id, "voter")}'}
+
+    for path in ('/events', '/sections', '/options', '/locations'):
+        response = client.get(f'{path}?limit=2', headers=admin_headers)
+        cursor = response.headers.get('X-Next-Cursor')
+        if cursor:
+            client.get(f'{path}?limit=2&cursor={cursor}', headers=admin_headers)
+
+    client.get(f'/events/{event_id}', headers=admin_headers)
+    client.get(f'/sections/{section_id}', headers=admin_headers)
+    client.get(f'/options/{option_id}', headers=admin_headers)
+    client.get(f'/events/{event_id}/results', headers=admin_headers)
+    client.get(f'/events/{event_id}/results/geography?level=district', headers=admin_headers)
+    client.get(f'/events/{event_id}/export/votes?format=ndjson', headers=admin_headers).get_data()
+    client.get(f'/events/{event_id}/export/results?format=csv', headers=admin_headers).get_data()
+    client.post('/vote', json={'event_id': event_id, 'section_id': section_id, 'option_id': option_id},
+                headers=voter_headers)
+    client.post('/auth/login', json={'email': 'voter0@bench.pe', 'password': 'wrong'},
+                headers={'x-api-key': os.environ['AUTH_API_KEY'], 'User-Agent': 'bench'})
+
+    # El rate limit durable no está en ninguna ruta; se ejecuta su consulta directamente
+    with app.test_request_context('/vote'):
+        SQLRateLimitStore().hit(('10.0.0.1', '/vote', 1), 1000, 60)
+
+
+def _ordered_page(statement, table, plan):
+    # Primera página de un listado: SQLite recorre la tabla en orden de id y
+    # se detiene en el LIMIT, así que no es un scan completo
+    return (f'ORDER BY {table}.id LIMIT' in ' '.join(statement.split())
+            and not any('TEMP B-TREE' in line for line in plan))
+
+
+def explain(engine, statement, parameters):
+    with engine.connect() as conn:
+        if engine.dialect.name == 'postgresql':
+            conn.exec_driver_sql('SET enable_seqscan = off')
+            rows = conn.exec_driver_sql(f'EXPLAIN {statement}', parameters).all()
+            plan = [row[0] for row in rows]
+            scans = POSTGRES_SCAN.findall('\n'.join(plan))
+        else:
+            rows = conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).all()
+            plan = [row[-1] for row in rows]
+            scans = [table for line in plan for table in SQLITE_SCAN.findall(line)
+                     if not _ordered_page(statement, table, plan)]
+    return plan, [table for table in scans if table not in ALLOWED_SCANS]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', help='Guarda los planes en este archivo JSON')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.setdefault('DATABASE_URL', f'sqlite:///{os.path.join(tmp, "plans.db")}')
+        os.environ.setdefault('ADMIN_API_KEY', 'bench-admin-key')
+        os.environ.setdefault('VOTES_API_KEY', 'bench-votes-key')
+        os.environ.setdefault('AUTH_API_KEY', 'bench-auth-key')
+        os.environ.setdefault('JWT_SECRET_KEY', 'bench-secret-bench-secret-bench-secret')
+
+        from app import create_app
+        from app.models import db
+
+        app = create_app()
+        with app.app_context():
+            db.create_all()
+            seed()
+            engine = db.engine
+
+        captured = capture(engine)
+        drive(app)
+
+        report, failures, seen = [], 0, set()
+        for endpoint, statement, parameters in captured:
+            if statement in seen:
+                continue
+            seen.add(statement)
+
+            plan, scans = explain(engine, statement, parameters)
+            report.append({'endpoint': endpoint, 'sql': statement, 'plan': plan, 'full_scans': scans})
+            if scans:
+                failures += 1
+                print(f'FULL SCAN on {", ".join(scans)} [{endpoint}]')
+                print('  ' + ' '.join(statement.split()))
+                for line in plan:
+                    print(f'    {line}')
+
+        print(f'{len(report)} queries checked, {failures} with full table scans')
+
+        if args.output:
+            with open(args.output, 'w') as handle:
+                json.dump(report, handle, indent=2)
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Compara requests por segundo de los backends de rate limiting.
+
+Uso:
+    python -m benchmarks.ratelimit_backends --requests 2000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+
+def run(backend, requests):
+    from app import create_app
+    from app.models import db
+    from app.utils.ratelimit import rate_limit
+
+    app = create_app()
+
+    @rate_limit(limit=requests + 1, seconds=60, backend=backend)
+    def guarded():
+        return 'ok'
+
+    app.add_url_rule('/bench', view_func=guarded, endpoint=f'bench_{backend}')
+
+    with app.app_context():
+        db.create_all()
+
+    client = app.test_client()
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = client.get('/bench')
+        assert response.status_code == 200, response.status_code
+    elapsed = time.perf_counter() - start
+
+    return requests / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.setdefault('DATABASE_URL', f'sqlite:///{os.path.join(tmp, "bench.db")}')
+
+        for backend in ('memory', 'durable'):
+            rps = run(backend, args.requests)
+            print(f'{backend:>8}: {rps:10.1f} req/s')
+
+
+if __name__ == '__main__':
+    main()
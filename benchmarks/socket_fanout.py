@@ -0,0 +1,77 @@
+"""
+Prueba de carga del broadcasting de resultados: muchos suscriptores
+simulados reciben los totales de una ráfaga de votos.
+
+Uso:
+    python -m benchmarks.socket_fanout --subscribers 500 --votes 10000 --ticks 5
+"""
+import argparse
+import os
+import tempfile
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--subscribers', type=int, default=500)
+    parser.add_argument('--votes', type=int, default=10000)
+    parser.add_argument('--ticks', type=int, default=5, help='envíos en lote durante la ráfaga')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.setdefault('DATABASE_URL', f'sqlite:///{os.path.join(tmp, "bench.db")}')
+        os.environ.setdefault('ADMIN_API_KEY', 'bench-admin-key')
+        os.environ['SOCKETIO_ASYNC_MODE'] = 'threading'
+
+        from app import create_app
+        from app.models import db
+        from app.services.tally import tally
+        from app.sockets import socketio, broadcaster, RESULTS_NAMESPACE
+        from benchmarks.vote_queries import seed_ballot
+
+        app = create_app()
+        with app.app_context():
+            db.create_all()
+            event_id, section_id, option_id = seed_ballot()
+
+            start = time.perf_counter()
+            clients = []
+            for _ in range(args.subscribers):
+                client = socketio.test_client(
+                    app,
+                    namespace=RESULTS_NAMESPACE,
+                    auth={'api_key': os.environ['ADMIN_API_KEY']}
+                )
+                client.emit('subscribe', {'event_id': event_id}, namespace=RESULTS_NAMESPACE)
+                client.get_received(RESULTS_NAMESPACE)
+                clients.append(client)
+            print(f'{args.subscribers} subscribers connected in {time.perf_counter() - start:.2f}s')
+
+            # Ráfaga de votos confirmados en `ticks` lotes (como el vote writer);
+            # los totales salen una vez por lote
+            per_tick = args.votes // args.ticks
+            start = time.perf_counter()
+            for first in range(1, args.votes + 1, per_tick):
+                user_ids = range(first, min(first + per_tick, args.votes + 1))
+                tally.record_votes((event_id, section_id, option_id, user_id) for user_id in user_ids)
+                db.session.commit()
+                for _ in user_ids:
+                    tally.record(event_id, section_id, option_id)
+                broadcaster.flush()
+            elapsed = time.perf_counter() - start
+
+            received = [client.get_received(RESULTS_NAMESPACE) for client in clients]
+            messages = sum(len(packets) for packets in received)
+            votes_seen = max(
+                option['votes']
+                for packet in received[0]
+                for option in packet['args'][0]['options']
+            )
+
+            print(f'{args.votes} votes -> {messages} messages total '
+                  f'({messages / args.subscribers:.1f} per subscriber, {votes_seen} votes per subscriber)')
+            print(f'record + fan-out: {elapsed:.2f}s ({args.votes / elapsed:.0f} votes/s)')
+
+
+if __name__ == '__main__':
+    main()
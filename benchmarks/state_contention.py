@@ -0,0 +1,144 @@
+"""
+Contención del StateStore compartido entre procesos.
+
+Lanza --processes procesos contra un mismo archivo SQLite (WAL) y mide:
+- incr sobre una sola clave (todos compiten por la misma fila),
+- incr sobre una clave por proceso,
+- compare_and_set optimista (leer, intentar, reintentar),
+- hits del rate limiter 'shared'.
+Verifica que los contadores finales sean exactos. Como referencia, repite
+las pruebas con MemoryStateStore y la misma cantidad de hilos en un proceso.
+
+Uso:
+    python -m benchmarks.state_contention --processes 4 --ops 2000
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+
+
+def incr_same(store, worker, ops):
+    for _ in range(ops):
+        store.incr('hot')
+
+
+def incr_own(store, worker, ops):
+    for _ in range(ops):
+        store.incr(f'own:{worker}')
+
+
+def cas_loop(store, worker, ops):
+    retries = 0
+    for _ in range(ops):
+        while True:
+            current = store.get('cas')
+            if store.compare_and_set('cas', current, (current or 0) + 1):
+                break
+            retries += 1
+    return retries
+
+
+def ratelimit_hits(store, worker, ops):
+    from app.utils.ratelimit import StateRateLimitStore
+
+    limiter = StateRateLimitStore(store)
+    for i in range(ops):
+        limiter.hit((f'10.0.{worker}.{i % 100}', '/vote', None), 1000, 60)
+
+
+SCENARIOS = [
+    ('incr, one shared key', incr_same, lambda store, workers, ops: store.get('hot') == workers * ops),
+    ('incr, key per worker', incr_own, lambda store, workers, ops: all(
+        store.get(f'own:{worker}') == ops for worker in range(workers))),
+    ('compare_and_set', cas_loop, lambda store, workers, ops: store.get('cas') == workers * ops),
+    ('ratelimit hit', ratelimit_hits, lambda store, workers, ops: True),
+]
+
+
+def _process(path, scenario, worker, ops, barrier, results):
+    from app.utils.state import SQLiteStateStore
+
+    store = SQLiteStateStore(path)
+    barrier.wait()
+    results.put(SCENARIOS[scenario][1](store, worker, ops) or 0)
+
+
+def run_processes(path, scenario, workers, ops):
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(workers + 1)
+    results = context.Queue()
+    processes = [
+        context.Process(target=_process, args=(path, scenario, worker, ops, barrier, results))
+        for worker in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    barrier.wait()
+    start = time.perf_counter()
+    retries = sum(results.get() for _ in processes)
+    elapsed = time.perf_counter() - start
+    for process in processes:
+        process.join()
+    return elapsed, retries
+
+
+def run_threads(store, scenario, workers, ops):
+    barrier = threading.Barrier(workers + 1)
+    retries = []
+
+    def target(worker):
+        barrier.wait()
+        retries.append(SCENARIOS[scenario][1](store, worker, ops) or 0)
+
+    threads = [threading.Thread(target=target, args=(worker,)) for worker in range(workers)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, sum(retries)
+
+
+def report(label, name, elapsed, total, retries, exact):
+    extra = f', {retries} CAS retries' if retries else ''
+    check = 'exact' if exact else 'MISMATCH'
+    print(f'{label:<7} {name:<22} {total / elapsed:>10.0f} ops/s{extra} ({check})')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--ops', type=int, default=2000)
+    args = parser.parse_args()
+
+    from app.utils.state import SQLiteStateStore, MemoryStateStore
+
+    workers, ops = args.processes, args.ops
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        for index, (name, _, verify) in enumerate(SCENARIOS):
+            path = os.path.join(tmp, f'state-{index}.db')
+            SQLiteStateStore(path)
+            elapsed, retries = run_processes(path, index, workers, ops)
+            exact = verify(SQLiteStateStore(path), workers, ops)
+            failed |= not exact
+            report('sqlite', name, elapsed, workers * ops, retries, exact)
+
+    for index, (name, _, verify) in enumerate(SCENARIOS):
+        store = MemoryStateStore()
+        elapsed, retries = run_threads(store, index, workers, ops)
+        exact = verify(store, workers, ops)
+        failed |= not exact
+        report('memory', name, elapsed, workers * ops, retries, exact)
+
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
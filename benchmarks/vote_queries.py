@@ -0,0 +1,98 @@
+"""
+Cuenta las sentencias SQL que ejecuta la emisión de un voto y termina con
+código 1 si supera el límite. Con la papeleta en cache, un voto aceptado
+ejecuta 3: INSERT del voto y los UPSERT de vt_vote_tallies y
+vt_vote_rollups; uno duplicado, 1 (el INSERT rechazado).
+
+Uso:
+    python -m benchmarks.vote_queries --voters 200 [--max-statements 3] [--max-duplicate-statements 1]
+"""
+import argparse
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+
+@contextmanager
+def count_statements(engine):
+    """Cuenta las sentencias enviadas a la base dentro del bloque."""
+    counter = {'statements': 0}
+
+    def before_cursor_execute(*args):
+        counter['statements'] += 1
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def seed_ballot():
+    from app.models import db, Event, Section, Option
+
+    now = datetime.utcnow()
+    election = Event(name='Bench', start_datetime=now - timedelta(hours=1), end_datetime=now + timedelta(hours=1))
+    db.session.add(election)
+    db.session.flush()
+
+    section = Section(name='Presidencia', event_id=election.id)
+    db.session.add(section)
+    db.session.flush()
+
+    option = Option(label='A', section_id=section.id)
+    db.session.add(option)
+    db.session.commit()
+
+    return election.id, section.id, option.id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--voters', type=int, default=200)
+    parser.add_argument('--max-statements', type=float, default=3,
+                        help='sentencias por voto aceptado (promedio)')
+    parser.add_argument('--max-duplicate-statements', type=float, default=1,
+                        help='sentencias por voto duplicado (promedio)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.setdefault('DATABASE_URL', f'sqlite:///{os.path.join(tmp, "bench.db")}')
+
+        from app import create_app
+        from app.models import db
+        from app.services import voting
+        from app.services.tally import tally
+
+        app = create_app()
+        with app.app_context():
+            db.create_all()
+            event_id, section_id, option_id = seed_ballot()
+            # Papeleta y estado congelado en cache, como en un worker ya caliente
+            voting.validate_ballot(event_id, section_id, option_id)
+            tally.is_frozen(event_id)
+
+            with count_statements(db.engine) as counter:
+                for user_id in range(1, args.voters + 1):
+                    voting.cast_vote(user_id, event_id, section_id, option_id)
+            accepted = counter['statements'] / args.voters
+            print(f'accepted vote:  {accepted:.2f} statements/vote (max {args.max_statements:g})')
+
+            with count_statements(db.engine) as counter:
+                for user_id in range(1, args.voters + 1):
+                    try:
+                        voting.cast_vote(user_id, event_id, section_id, option_id)
+                    except voting.VoteError as e:
+                        assert e.status_code == 409, e.status_code
+            duplicate = counter['statements'] / args.voters
+            print(f'duplicate vote: {duplicate:.2f} statements/vote (max {args.max_duplicate_statements:g})')
+
+    sys.exit(1 if accepted > args.max_statements or duplicate > args.max_duplicate_statements else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,4 @@
+-- Local de votación desde el que se emitió cada voto (kioskos).
+-- Bases creadas antes de este cambio; create_all ya crea la columna en bases nuevas.
+ALTER TABLE vt_votes ADD COLUMN voting_location_id INTEGER REFERENCES vt_voting_locations (id);
+CREATE INDEX IF NOT EXISTS ix_vt_votes_voting_location_id ON vt_votes (voting_location_id);
@@ -0,0 +1,4 @@
+-- Votos en lote desde kioskos sin conexión (POST /votes/batch).
+ALTER TABLE vt_votes ADD COLUMN client_timestamp TIMESTAMP;
+ALTER TABLE vt_votes ADD COLUMN idempotency_key VARCHAR(64);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_vt_votes_idempotency_key ON vt_votes (idempotency_key);
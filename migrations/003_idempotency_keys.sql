@@ -0,0 +1,10 @@
+-- Respuestas guardadas por Idempotency-Key (IDEMPOTENCY_BACKEND='durable').
+CREATE TABLE IF NOT EXISTS vt_idempotency_keys (
+    key VARCHAR(64) PRIMARY KEY,
+    fingerprint VARCHAR(64) NOT NULL,
+    status_code INTEGER NOT NULL,
+    content_type VARCHAR(100),
+    body BYTEA NOT NULL,
+    expires_at TIMESTAMP NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_vt_idempotency_keys_expires_at ON vt_idempotency_keys (expires_at);
@@ -0,0 +1,17 @@
+-- Índices compuestos y parciales para las consultas más frecuentes.
+-- create_all ya los crea en bases nuevas. En PostgreSQL con tablas grandes,
+-- conviene ejecutar cada CREATE INDEX con CONCURRENTLY (fuera de una transacción).
+
+-- Rate limit durable: WHERE ip = ? AND route = ? AND timestamp >= ? [AND user_id = ?]
+CREATE INDEX IF NOT EXISTS ix_vt_request_logs_ip_route_timestamp
+    ON vt_request_logs (ip, route, timestamp, user_id);
+
+-- Papeleta, conteo y exportaciones: joins por evento → sección → opción
+CREATE INDEX IF NOT EXISTS ix_vt_sections_event_id_id ON vt_sections (event_id, id);
+CREATE INDEX IF NOT EXISTS ix_vt_options_section_id_id ON vt_options (section_id, id);
+CREATE INDEX IF NOT EXISTS ix_vt_votes_section_id_option_id ON vt_votes (section_id, option_id);
+
+-- Listados paginados: WHERE status <> 'deleted' AND id > :cursor ORDER BY id
+CREATE INDEX IF NOT EXISTS ix_vt_events_live_id ON vt_events (id) WHERE status <> 'deleted';
+CREATE INDEX IF NOT EXISTS ix_vt_sections_live_id ON vt_sections (id) WHERE status <> 'deleted';
+CREATE INDEX IF NOT EXISTS ix_vt_options_live_id ON vt_options (id) WHERE status <> 'deleted';
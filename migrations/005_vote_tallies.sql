@@ -0,0 +1,11 @@
+-- Conteos por opción: se precrean al abrir cada evento y se congelan al cerrarlo.
+CREATE TABLE IF NOT EXISTS vt_vote_tallies (
+    id SERIAL PRIMARY KEY,
+    event_id INTEGER NOT NULL REFERENCES vt_events (id),
+    section_id INTEGER NOT NULL REFERENCES vt_sections (id),
+    option_id INTEGER NOT NULL REFERENCES vt_options (id),
+    votes INTEGER NOT NULL DEFAULT 0,
+    frozen BOOLEAN NOT NULL DEFAULT FALSE,
+    frozen_at TIMESTAMP,
+    CONSTRAINT unique_tally_per_option UNIQUE (event_id, section_id, option_id)
+);
@@ -0,0 +1,19 @@
+-- Rollups por zona repartidos en shards (user_id % VOTE_ROLLUP_SHARDS) para
+-- que los votos de un mismo distrito no compitan por una sola fila.
+CREATE TABLE IF NOT EXISTS vt_vote_rollups (
+    id SERIAL PRIMARY KEY,
+    event_id INTEGER NOT NULL REFERENCES vt_events (id),
+    section_id INTEGER NOT NULL REFERENCES vt_sections (id),
+    option_id INTEGER NOT NULL REFERENCES vt_options (id),
+    region VARCHAR(50) NOT NULL DEFAULT '',
+    province VARCHAR(50) NOT NULL DEFAULT '',
+    district VARCHAR(50) NOT NULL DEFAULT '',
+    shard SMALLINT NOT NULL DEFAULT 0,
+    votes INTEGER NOT NULL DEFAULT 0
+);
+
+-- Tablas creadas antes por db.create_all(): las filas existentes quedan en el shard 0
+ALTER TABLE vt_vote_rollups ADD COLUMN IF NOT EXISTS shard SMALLINT NOT NULL DEFAULT 0;
+ALTER TABLE vt_vote_rollups DROP CONSTRAINT IF EXISTS unique_rollup_bucket;
+ALTER TABLE vt_vote_rollups ADD CONSTRAINT unique_rollup_bucket
+    UNIQUE (event_id, section_id, option_id, region, province, district, shard);
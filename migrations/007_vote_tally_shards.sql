@@ -0,0 +1,27 @@
+-- Conteo en vivo compartido por los workers: cada voto suma en su transacción
+-- a una de VOTE_TALLY_SHARDS filas por opción (shard = user_id % shards).
+-- Correr sin votación en curso: el LOCK detiene los votos mientras se cargan
+-- desde vt_votes los conteos de los eventos no congelados (antes vivían en
+-- memoria de cada worker y sus filas estaban en cero).
+BEGIN;
+
+LOCK TABLE vt_votes IN SHARE MODE;
+
+ALTER TABLE vt_vote_tallies ADD COLUMN IF NOT EXISTS shard SMALLINT NOT NULL DEFAULT 0;
+ALTER TABLE vt_vote_tallies DROP CONSTRAINT IF EXISTS unique_tally_per_option;
+ALTER TABLE vt_vote_tallies ADD CONSTRAINT unique_tally_per_shard
+    UNIQUE (event_id, section_id, option_id, shard);
+
+UPDATE vt_vote_tallies SET votes = 0 WHERE NOT frozen;
+
+INSERT INTO vt_vote_tallies (event_id, section_id, option_id, shard, votes, frozen)
+SELECT s.event_id, v.section_id, v.option_id, 0, count(*), FALSE
+FROM vt_votes v
+JOIN vt_sections s ON s.id = v.section_id
+WHERE NOT EXISTS (
+    SELECT 1 FROM vt_vote_tallies f WHERE f.event_id = s.event_id AND f.frozen
+)
+GROUP BY s.event_id, v.section_id, v.option_id
+ON CONFLICT (event_id, section_id, option_id, shard) DO UPDATE SET votes = EXCLUDED.votes;
+
+COMMIT;
@@ -0,0 +1,10 @@
+-- Filas vencidas de vt_request_logs (REQUEST_LOG_RETENTION_MODE='archive'):
+-- conservan el id original, por eso sin SERIAL.
+CREATE TABLE IF NOT EXISTS vt_request_logs_archive (
+    id INTEGER PRIMARY KEY,
+    ip VARCHAR(45) NOT NULL,
+    route VARCHAR(100) NOT NULL,
+    user_id INTEGER,
+    timestamp TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS ix_vt_request_logs_archive_timestamp ON vt_request_logs_archive (timestamp);
@@ -1,11 +1,10 @@
-from app import create_app
-from app.models import db
+from app import create_app, start_background_jobs
+from app.sockets import socketio
 
+# Servidor de desarrollo. En producción: python serve.py (ver serve.py).
+# Las tablas se crean una sola vez con: flask --app run init-db
 app = create_app()
 
-# Crear tablas si no existen
-with app.app_context():
-    db.create_all()
-
 if __name__ == '__main__':
-    app.run(debug=True)
+    start_background_jobs(app)
+    socketio.run(app, debug=True)
@@ -0,0 +1,103 @@
+"""
+Servidor de producción: Socket.IO sobre eventlet, con WEB_CONCURRENCY
+procesos worker que comparten el mismo socket de escucha.
+
+    flask --app run init-db          # una vez por despliegue
+    WEB_CONCURRENCY=4 SOCKETIO_MESSAGE_QUEUE=redis://localhost:6379/0 python serve.py
+
+- HOST / PORT: dirección de escucha (0.0.0.0:5000).
+- WEB_CONCURRENCY: número de workers (1 = un solo proceso, sin fork).
+- Con más de un worker, SOCKETIO_MESSAGE_QUEUE es obligatorio para que los
+  emits lleguen a los dashboards conectados a otros workers, y como el
+  kernel reparte las conexiones entre workers, los clientes Socket.IO deben
+  usar solo el transporte websocket (o ir detrás de un balanceador con
+  sesiones fijas).
+El proceso maestro no crea la app: solo abre el socket, lanza los workers,
+reemplaza los que mueren y reenvía SIGTERM/SIGINT.
+"""
+import eventlet
+eventlet.monkey_patch()
+
+import logging
+import os
+import signal
+import sys
+import time
+
+from eventlet import wsgi
+
+logger = logging.getLogger('votario.serve')
+
+
+def serve_worker(sock):
+    """Cuerpo de cada worker: crea su propia app (pool de conexiones, hilos) y atiende."""
+    from app import create_app, start_background_jobs
+
+    app = create_app()
+    start_background_jobs(app)
+    wsgi.server(sock, app, log_output=False)
+
+
+def spawn(sock):
+    pid = os.fork()
+    if pid == 0:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        try:
+            serve_worker(sock)
+        finally:
+            os._exit(0)
+    return pid
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(message)s')
+
+    host = os.environ.get('HOST', '0.0.0.0')
+    port = int(os.environ.get('PORT', 5000))
+    workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+
+    if workers > 1 and not os.environ.get('SOCKETIO_MESSAGE_QUEUE'):
+        sys.exit('WEB_CONCURRENCY > 1 requires SOCKETIO_MESSAGE_QUEUE (redis://, amqp://...)')
+    if os.environ.get('SOCKETIO_MESSAGE_QUEUE') == 'local://' and workers > 1:
+        sys.exit('local:// only works within one process; use a real broker with several workers')
+
+    sock = eventlet.listen((host, port))
+    logger.info('Listening on %s:%d with %d worker(s)', host, port, workers)
+
+    if workers == 1:
+        serve_worker(sock)
+        return
+
+    children = {spawn(sock) for _ in range(workers)}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        children.discard(pid)
+
+        if not stopping:
+            logger.warning('Worker %d exited with status %d; restarting', pid, status)
+            time.sleep(1)
+            children.add(spawn(sock))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,8 @@
+# Punto de entrada para gunicorn con workers eventlet:
+#   gunicorn -k eventlet -w $WEB_CONCURRENCY --bind 0.0.0.0:8000 wsgi:app
+# Con más de un worker, SOCKETIO_MESSAGE_QUEUE debe apuntar a un broker y el
+# balanceador debe mantener sesiones fijas (sticky) para el long-polling.
+from app import create_app, start_background_jobs
+
+app = create_app()
+start_background_jobs(app)